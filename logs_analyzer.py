@@ -5,12 +5,31 @@ import ftplib
 import traceback
 import json
 import ast
-from datetime import datetime
+import hashlib
+import html
+import mmap
+import argparse
+import gc
+import tracemalloc
+import heapq
+import time
+import random
+from datetime import datetime, timedelta
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 import pandas as pd
 import logging
 import traceback
 from zoneinfo import ZoneInfo
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 # Awaryjny wpis do debug.txt
 with open("debug.txt", "a", encoding="utf-8") as f:
@@ -20,12 +39,35 @@ with open("debug.txt", "a", encoding="utf-8") as f:
 os.makedirs("logs", exist_ok=True)
 LOG_DIR = "log_cache"
 REPORT_DIR = "docs"
+DAY_PAGES_DIR = os.path.join(REPORT_DIR, "days")
+DAY_PAGES_MANIFEST = os.path.join(DAY_PAGES_DIR, "pages.json")
+# Zmiana szablonu strony dziennej wymusza ponowne wygenerowanie wszystkich dni
+DAY_PAGE_VERSION = 2
+EXPORT_DIR = os.path.join(REPORT_DIR, "exports")
+EXPORT_MANIFEST = os.path.join(EXPORT_DIR, "manifest.json")
+# Zmiana formatu eksportu wymusza ponowny zapis wszystkich dni
+EXPORT_VERSION = 3
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 # Pliki do logowania
 ERROR_LOG = os.path.join("logs", "error_log.txt")
 UNPARSED_LOG = os.path.join("logs", "unparsed_lines.txt")
+MOD_MANIFEST_FILE = os.path.join("logs", "mod_manifests.json")
+ERROR_FINGERPRINTS_FILE = os.path.join("logs", "error_fingerprints.json")
+FAST_SCAN_FILE = os.path.join("logs", "fast_scan.json")
+BENCH_MEMORY_FILE = os.path.join("logs", "bench_memory.json")
+ANOMALY_STATE_FILE = os.path.join("logs", "anomaly_state.json")
+ANOMALY_ALERTS_FILE = os.path.join("logs", "alerts.json")
+SESSION_QUERY_FILE = os.path.join("logs", "session_query.json")
+NETWORK_CORRELATION_FILE = os.path.join("logs", "network_correlation.json")
+SAVE_OPERATIONS_FILE = os.path.join("logs", "save_operations.json")
+PATTERN_PROFILE_FILE = os.path.join("logs", "pattern_profile.json")
+RETENTION_FILE = os.path.join("logs", "retention.json")
+TIME_INDEX_FILE = os.path.join("logs", "time_index.json")
+RANGE_REPORT_FILE = os.path.join("logs", "range_report.json")
+BOOT_PROFILES_FILE = os.path.join("logs", "boot_profiles.json")
+DENSITY_BUDGET_FILE = os.path.join("logs", "density_budget.json")
 
 # Konfiguracja logging
 logging.basicConfig(
@@ -60,16 +102,73 @@ FTP_PASS = os.environ.get("FTP_PASS")
 FTP_DIR = os.environ.get("FTP_DIR")
 FTP_DIR2 = os.environ.get("FTP_DIR2")
 
+# Lista serwerów: FTP_SERVERS (JSON) albo plik servers.json, np.
+# [{"name": "main", "host": "...", "port": 21, "user": "...", "pass": "...", "dir": "/profile/log"}]
+# Brakujące pola dziedziczą wartości z FTP_HOST/FTP_PORT/FTP_USER/FTP_PASS.
+SERVERS_FILE = "servers.json"
+SERVER_NAME_RE = re.compile(r"[^\w.-]+")
+
+def load_servers():
+    raw = os.environ.get("FTP_SERVERS")
+    source = "FTP_SERVERS"
+    if not raw and os.path.exists(SERVERS_FILE):
+        with open(SERVERS_FILE, "r", encoding="utf-8") as f:
+            raw = f.read()
+        source = SERVERS_FILE
+
+    entries = []
+    if raw:
+        try:
+            entries = json.loads(raw)
+        except ValueError as e:
+            logging.error(f"❌ Nieprawidłowy JSON listy serwerów ({source}): {e}")
+            entries = []
+    else:
+        # Tryb zgodności: stare zmienne FTP_DIR / FTP_DIR2
+        for i, ftp_dir in enumerate([FTP_DIR, FTP_DIR2], start=1):
+            if ftp_dir:
+                entries.append({"name": f"server{i}", "dir": ftp_dir})
+
+    servers = []
+    seen = set()
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not entry.get("dir"):
+            logging.warning(f"⚠️ Pomijam wpis serwera bez katalogu: {entry}")
+            continue
+        name = SERVER_NAME_RE.sub("_", str(entry.get("name") or f"server{i}")).strip("_") or f"server{i}"
+        if name in seen:
+            logging.warning(f"⚠️ Zduplikowana nazwa serwera {name}, pomijam.")
+            continue
+        seen.add(name)
+        servers.append({
+            "name": name,
+            "host": entry.get("host") or FTP_HOST,
+            "port": int(entry.get("port") or FTP_PORT),
+            "user": entry.get("user") or FTP_USER,
+            "pass": entry.get("pass") or FTP_PASS,
+            "dir": entry["dir"],
+        })
+    return servers
+
+# Katalog cache dla danego serwera (osobna przestrzeń nazw plików)
+def server_cache_dir(name):
+    path = os.path.join(LOG_DIR, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
 print("✅ Konfiguracja zakończona — startuję analizę...")
 
 # Wzorce do parsowania
 TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})")
+BOOT_FILE_RE = re.compile(r"log_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.txt$")
+MOD_REVISION_RE = re.compile(r"\s*\(Revision: \d+\)$")
 EVENTS = {
-    "player_connected": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+([^\s].*?)\s+(joined the game)",
-    "player_disconnected": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+([^\s].*?)\s+(lost connection to the game|left the game)",
+    "player_connected": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+([^\s](?:.*?[^\s])??)\s+(joined the game)",
+    "player_disconnected": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})\s+([^\s](?:.*?[^\s])??)\s+(lost connection to the game|left the game)",
     "executed_command": r"(?:Executed command|Admin command|Command): (\w+)\s*(.*)",
     "admin_action": r"ADMIN: (.*)",
     "lua_error": r"Error: Running LUA method '(\w+)'. (.*)",
+    "script_error": r"^Script error in (\w+): (.*)",
     "warning_stream": r"Warning: StreamWriteTimestamp (.*)",
     "memory_warning": r"Lua memory usage has reached (\d+) KB; (.*)",
     "file_load": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) (.+) \(([\d.]+) ms\)",
@@ -83,14 +182,38 @@ EVENTS = {
     "real_dirt_color": r"Real Dirt Color successfully applied to (.+)",
     "error": r"Error: (.+)",
     "warning": r"Warning: (.+)",
+    "density_map": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) FTG '(.*)' max needed CPU instances = ([\d.]+) MB / ([\d.]+) MB",
     "system_info": r"(GIANTS Engine Runtime|Copyright|Application|PID|Main System|CPU|Virtual Cores|Memory|OS|Physics System|Version|Thread|Sound System|Driver|Render System|NullConsoleDevice|Started \d+ threads|Hardware Profile|Level|Recommended Window Size|UI Scaling Factor|3D Scaling Factor|View Distance Factor|LOD Distance Factor)",
     "direct_storage": r"\[DirectStorage\] (.*)",
     "value_line": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) (\d+\.\d+)",
     "info_add": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})   Info: (.*)",
     "forestry_helper": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) FS25_ForestryHelper: (.*)",
-    "density_map": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) FTG '(.*)' max needed CPU instances = ([\d.]+) MB / ([\d.]+) MB",
     "master_login": r"Info: \[Easy Development Controls\] User (\w+) has logged in as master user.",
 }
+# density_map stoi przed system_info, bo "CPU" z system_info pasuje też do "max needed CPU instances"
+# Nazwa gracza kończy się znakiem niebiałym: leniwe (.*?) nie próbuje \s+ z każdej pozycji
+# w serii spacji, więc linia "<czas> a" + tysiące spacji nie jest już kwadratowa
+# Literały (małymi literami), bez których wzorzec nie może pasować. Wzorce zaczynające się od
+# znacznika czasu nie mają stałego prefiksu i re próbuje ich od każdej pozycji linii - dla linii
+# ASCII tani test "in" pomija je z góry (dla innych linii decyduje sam regex, bo IGNORECASE
+# dopasowuje np. "İ" do "i", czego nie da się sprawdzić przez lower())
+EVENT_LITERALS = {
+    "player_connected": ("joined the game",),
+    "player_disconnected": ("lost connection to the game", "left the game"),
+    "file_load": (" ms)",),
+    "info_add": ("   info: ",),
+    "forestry_helper": (" fs25_forestryhelper: ",),
+    "density_map": (" ftg '",),
+}
+# Ochrona przed patologicznymi liniami: dłuższe linie są przycinane przed dopasowaniem
+# (najdłuższa linia w log_cache ma ~400 znaków). Razem z liniowymi wzorcami to jest ograniczenie
+# pracy na linię - nie ma pomiaru czasu w trakcie parsowania (przerywanie zegarem dawałoby różne
+# wyniki zależnie od pauz GC), a --bench-patterns sprawdza, że koszt nie rośnie powyżej limitu
+LINE_MAX_CHARS = 2048
+
+def literal_miss(etype, lowered):
+    literals = EVENT_LITERALS.get(etype)
+    return bool(literals) and lowered is not None and not any(literal in lowered for literal in literals)
 
 # Funkcja do konwersji Details na słownik
 def parse_details(details):
@@ -105,21 +228,26 @@ def parse_details(details):
     return {}
 
 # Pobieranie logów z FTP
-def download_logs(DIR):
+def download_logs(server):
     try:
-        logging.info("🔄 Łączenie z FTP...")
+        logging.info(f"🔄 Łączenie z FTP ({server['name']})...")
+        cache_dir = server_cache_dir(server["name"])
         with ftplib.FTP() as ftp:
-            ftp.connect(FTP_HOST, FTP_PORT)
-            ftp.login(FTP_USER, FTP_PASS)
-            ftp.cwd(DIR)
+            ftp.connect(server["host"], server["port"])
+            ftp.login(server["user"], server["pass"])
+            ftp.cwd(server["dir"])
             entries = []
             ftp.retrlines("MLSD", entries.append)
             files = [line.split(";")[-1].strip() for line in entries if line.endswith(".txt")]
             logging.info(f"📄 Znaleziono {len(files)} plików logów.")
             
+            compacted = load_retention_store()["compacted"].get(server["name"], {})
             for filename in files:
-                local_path = os.path.join(LOG_DIR, filename)
+                local_path = os.path.join(cache_dir, filename)
                 download = True
+                if filename in compacted:
+                    logging.info(f"⏭️ Pominięto (zarchiwizowany przez retencję): {filename}")
+                    continue
                 if os.path.exists(local_path):
                     remote_size = ftp.size(filename) if hasattr(ftp, 'size') else None
                     local_size = os.path.getsize(local_path)
@@ -146,15 +274,136 @@ def download_logs(DIR):
                     logging.info(f"✅ Pobrano: {filename}")
     except Exception as e:
         with open(ERROR_LOG, "a", encoding="utf-8") as f:
-            f.write(f"{datetime.now()}: Błąd FTP: {e}\n{traceback.format_exc()}\n")
-        logging.error(f"❌ Błąd FTP: {e}")
+            f.write(f"{datetime.now()}: Błąd FTP ({server['name']}): {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd FTP ({server['name']}): {e}")
+
+# Przeniesienie plików ze starego, wspólnego log_cache do przestrzeni pierwszego serwera
+def migrate_legacy_cache(servers):
+    if not servers:
+        return
+    target = server_cache_dir(servers[0]["name"])
+    for fname in os.listdir(LOG_DIR):
+        src = os.path.join(LOG_DIR, fname)
+        if not (fname.endswith(".txt") and os.path.isfile(src)):
+            continue
+        dst = os.path.join(target, fname)
+        if os.path.exists(dst):
+            logging.info(f"⏭️ Pominięto migrację (plik istnieje): {fname}")
+            continue
+        os.replace(src, dst)
+        logging.info(f"📦 Przeniesiono {fname} do {target}")
+
+# Przestrzenie nazw w log_cache: podkatalogi serwerów + pliki z katalogu głównego jako "default"
+def discover_namespaces(servers):
+    names = [s["name"] for s in servers]
+    for entry in sorted(os.listdir(LOG_DIR)):
+        path = os.path.join(LOG_DIR, entry)
+        if os.path.isdir(path) and entry not in names:
+            names.append(entry)
+    if any(f.endswith(".txt") and os.path.isfile(os.path.join(LOG_DIR, f)) for f in os.listdir(LOG_DIR)):
+        names.append("default")
+    return names
+
+def namespace_dir(name):
+    if name == "default" and not os.path.isdir(os.path.join(LOG_DIR, name)):
+        return LOG_DIR
+    return os.path.join(LOG_DIR, name)
+
+# Szybkie znaczniki czasu: stały format "YYYY-MM-DD HH:MM:SS.fff" parsowany przez cięcie napisu,
+# z pamięcią podręczną na poziomie sekundy (w logach wiele linii ma tę samą sekundę)
+TS_CACHE = {}
+TS_CACHE_LIMIT = 200000
+
+def parse_timestamp(text):
+    second = text[:19]
+    base = TS_CACHE.get(second)
+    if base is None:
+        if len(TS_CACHE) >= TS_CACHE_LIMIT:
+            TS_CACHE.clear()
+        base = datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]), int(text[14:16]), int(text[17:19]))
+        TS_CACHE[second] = base
+    return base.replace(microsecond=int(text[20:23]) * 1000)
+
+# Kolumna znaczników czasu jako datetime64 w jednej operacji (None -> NaT)
+def timestamps_to_datetime64(values):
+    return pd.Series(np.array(values, dtype="datetime64[ms]").astype("datetime64[ns]"))
+
+# Zwarty rekord zdarzenia: __slots__ zamiast słownika, internowane napisy,
+# a surowa linia czytana z pliku na żądanie na podstawie (plik, offset, długość)
+INTERNED_DETAILS = ("PlayerName", "Reason", "Phase", "Name", "Version", "Hash", "Mod", "Entry", "Message", "Info", "Command", "User", "Method", "Path")
+EVENT_COLUMNS = ["Timestamp", "EventType", "LineType", "Details", "Server", "File", "Count"]
+
+class Event:
+    __slots__ = ("Timestamp", "EventType", "LineType", "Details", "Server", "File", "Offset", "Length", "Inferred", "Count", "LastTimestamp")
+
+    def __init__(self, timestamp, event_type, line_type, details, server, file, offset, length):
+        self.Timestamp = timestamp
+        self.Inferred = False
+        self.Count = 1
+        self.LastTimestamp = None
+        self.EventType = sys.intern(event_type)
+        self.LineType = sys.intern(line_type)
+        self.Details = details
+        self.Server = sys.intern(server)
+        self.File = sys.intern(file)
+        self.Offset = offset
+        self.Length = length
+
+    @classmethod
+    def from_entry(cls, entry, server, file, offset, length):
+        details = entry["Details"]
+        for key in INTERNED_DETAILS:
+            value = details.get(key)
+            if type(value) is str:
+                details[key] = sys.intern(value)
+        return cls(entry["Timestamp"], entry["EventType"], entry["LineType"], details, server, file, offset, length)
+
+    @property
+    def RawLine(self):
+        return read_raw_block(self.Server, self.File, self.Offset, self.Length)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self, with_raw=False):
+        entry = {col: getattr(self, col) for col in EVENT_COLUMNS}
+        if with_raw:
+            entry["RawLine"] = self.RawLine
+        return entry
+
+def read_raw_block(server, file, offset, length):
+    try:
+        with open(os.path.join(namespace_dir(server), file), "rb") as f:
+            f.seek(offset)
+            raw = f.read(length)
+        return "\n".join(part.rstrip() for part in raw.decode("utf-8", errors="replace").split("\n")).strip()
+    except OSError as e:
+        logging.warning(f"⚠️ Nie można odczytać surowej linii {file}@{offset}: {e}")
+        return ""
+
+# DataFrame ze zdarzeń (kolumna po kolumnie, bez kopiowania surowych linii)
+def events_frame(events):
+    if not events:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    frame = pd.DataFrame({col: [getattr(e, col) for e in events] for col in EVENT_COLUMNS if col != "Timestamp"})
+    frame.insert(0, "Timestamp", timestamps_to_datetime64([e.Timestamp for e in events]))
+    return frame[EVENT_COLUMNS]
 
 # Parsowanie linii
 def parse_line(line):
     try:
-        line = line.encode('utf-8', errors='ignore').decode('utf-8').strip()
+        line = line.strip()
         if not line:
             return None
+        if len(line) > LINE_MAX_CHARS:
+            logging.warning(f"⚠️ Linia ma {len(line)} znaków - przycinam do {LINE_MAX_CHARS}: {line[:80]}…")
+            line = line[:LINE_MAX_CHARS]
 
         entry = {
             "Timestamp": None,
@@ -167,7 +416,7 @@ def parse_line(line):
         ts_match = TIMESTAMP.search(line)
         if ts_match:
             try:
-                entry["Timestamp"] = datetime.strptime(ts_match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                entry["Timestamp"] = parse_timestamp(ts_match.group(1))
             except ValueError as e:
                 logging.warning(f"⚠️ Nieprawidłowy format timestamp w linii: {line} - {e}")
 
@@ -180,8 +429,14 @@ def parse_line(line):
         elif "WARNING:" in line or "Warning" in line:
             entry["LineType"] = "WARNING"
 
+        lowered = line.lower() if line.isascii() else None
+        if PATTERN_PROFILE is not None:
+            profile_line(line, lowered)
+
         matched = False
         for etype, pattern in EVENTS.items():
+            if literal_miss(etype, lowered):
+                continue
             try:
                 match = re.search(pattern, line, re.IGNORECASE)
                 if match:
@@ -194,11 +449,13 @@ def parse_line(line):
                                 entry["Details"]["Error"] = "Brak nazwy gracza"
                             else:
                                 entry["Details"]["PlayerName"] = player_name
-                                entry["Timestamp"] = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                                entry["Timestamp"] = parse_timestamp(match.group(1))
+                                if etype == "player_disconnected":
+                                    entry["Details"]["Reason"] = "lost" if match.group(3).lower().startswith("lost") else "left"
                         elif etype == "file_load":
                             entry["Details"]["Path"] = match.group(2).strip()
                             entry["Details"]["LoadTimeMS"] = float(match.group(3))
-                            entry["Timestamp"] = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                            entry["Timestamp"] = parse_timestamp(match.group(1))
                         elif etype == "real_dirt_color":
                             entry["Details"]["AppliedTo"] = match.group(1).strip()
                         elif etype == "executed_command":
@@ -206,7 +463,10 @@ def parse_line(line):
                             entry["Details"]["Args"] = match.group(2).strip()
                         elif etype == "admin_action":
                             entry["Details"]["Message"] = match.group(1).strip()
-                        elif etype == "lua_error":
+                        elif etype in ["lua_error", "script_error"]:
+                            if etype == "script_error":
+                                # "Script error in X:" nie zawiera "Error" - to nagłówek grupy ze stosem Lua
+                                entry["LineType"] = "ERROR"
                             entry["Details"]["Method"] = match.group(1)
                             entry["Details"]["Message"] = match.group(2)
                         elif etype == "memory_warning":
@@ -226,21 +486,23 @@ def parse_line(line):
                         elif etype == "direct_storage":
                             entry["Details"]["Message"] = match.group(1)
                         elif etype == "value_line":
-                            entry["Timestamp"] = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                            entry["Timestamp"] = parse_timestamp(match.group(1))
                             entry["Details"]["Value"] = float(match.group(2))
                         elif etype == "info_add":
-                            entry["Timestamp"] = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                            entry["Timestamp"] = parse_timestamp(match.group(1))
                             entry["Details"]["Message"] = match.group(2)
                         elif etype == "forestry_helper":
-                            entry["Timestamp"] = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                            entry["Timestamp"] = parse_timestamp(match.group(1))
                             entry["Details"]["Message"] = match.group(2)
                         elif etype == "density_map":
-                            entry["Timestamp"] = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S.%f")
+                            entry["Timestamp"] = parse_timestamp(match.group(1))
                             entry["Details"]["Path"] = match.group(2)
                             entry["Details"]["MaxCPU"] = float(match.group(3))
                             entry["Details"]["TotalMB"] = float(match.group(4))
                         elif etype == "master_login":
                             entry["Details"]["User"] = match.group(1)
+                        elif etype == "save_game":
+                            entry["Details"]["Phase"] = "start" if match.group(0).lower().startswith("saving") else "done"
                     except Exception as e:
                         entry["Details"]["Error"] = f"Błąd parsowania szczegółów dla {etype}: {e}"
                         logging.error(f"❌ Błąd parsowania szczegółów dla {etype} w linii: {line} - {e}")
@@ -252,11 +514,6 @@ def parse_line(line):
         if not matched:
             entry["EventType"] = "other"
             entry["Details"]["Message"] = line
-            if ts_match:
-                try:
-                    entry["Timestamp"] = datetime.strptime(ts_match.group(1), "%Y-%m-%d %H:%M:%S.%f")
-                except ValueError as e:
-                    logging.warning(f"⚠️ Nieprawidłowy timestamp w niepasującej linii: {line} - {e}")
 
         return entry
     except Exception as e:
@@ -265,29 +522,225 @@ def parse_line(line):
         logging.error(f"❌ Błąd parsowania linii: {line} - {e}")
         return None
 
-# Analiza wszystkich logów w katalogu
-def analyze_logs():
+# Grupowanie wieloliniowych błędów: linie kontynuacji (stos wywołań Lua, "Script error:",
+# ścieżki silnika, puste linie) są doklejane do ostatniego błędu/ostrzeżenia. FS25 zapisuje też
+# "<czas> " w osobnej linii, a pod nią "Script error in X: ..." i stos - sam znacznik czasu
+# jest wtedy dołączany do nagłówka script_error (BARE_TIMESTAMP_RE)
+CONTINUATION_RE = re.compile(r"^(?:\s*$|\s+=|\s+[A-Za-z]:\\|(?:\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3} )?(?:LUA call stack:|Script error:))")
+STACK_FRAME_RE = re.compile(r"^\s+=(\S+?:\d+)(?:\s+(\S+))?")
+FINGERPRINT_DIGITS_RE = re.compile(r"\d+")
+BARE_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}")
+
+def is_bare_timestamp(event, next_offset):
+    # Linia z samym znacznikiem czasu bezpośrednio przed bieżącą (nie zwinięta przez RLE)
+    return (event.EventType == "other" and event.Count == 1 and not event.Inferred
+            and event.Offset + event.Length + 1 == next_offset
+            and BARE_TIMESTAMP_RE.fullmatch(event.Details.get("Message", "")) is not None)
+
+def attach_continuation(entry, line, block_end):
+    line = line.rstrip("\r\n")
+    if not line.strip():
+        return
+    entry.Length = block_end - entry.Offset
+    details = entry.Details
+    frame = STACK_FRAME_RE.match(line)
+    if frame:
+        details.setdefault("Stack", []).append(frame.group(1))
+    elif "Script error:" in line:
+        details["ScriptError"] = line.split("Script error:", 1)[1].strip()
+    details["ContinuationLines"] = details.get("ContinuationLines", 0) + 1
+
+def finalize_error_group(entry, header_line):
+    details = entry.Details
+    stack = details.get("Stack")
+    if stack:
+        key = "stack|" + "|".join(stack)
+    else:
+        message = details.get("Message") or header_line
+        key = "msg|" + entry.EventType + "|" + FINGERPRINT_DIGITS_RE.sub("#", TIMESTAMP.sub("", message)).strip()
+    details["Fingerprint"] = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+# Tabela unikalnych problemów (fingerprint -> liczba wystąpień, pierwsze/ostatnie, przykład)
+def build_fingerprint_table(events):
+    table = {}
+    for event in events:
+        details = event.get("Details") or {}
+        fp = details.get("Fingerprint")
+        if not fp:
+            continue
+        ts = event.get("Timestamp")
+        row = table.get(fp)
+        if row is None:
+            row = table[fp] = {
+                "Fingerprint": fp,
+                "LineType": event.get("LineType"),
+                "EventType": event.get("EventType"),
+                "Message": details.get("ScriptError") or details.get("Message"),
+                "StackDepth": len(details.get("Stack", [])),
+                "Count": 0,
+                "FirstSeen": ts,
+                "LastSeen": ts,
+                "Sample": event,
+            }
+        row["Count"] += 1
+        if ts is not None:
+            if row["FirstSeen"] is None or ts < row["FirstSeen"]:
+                row["FirstSeen"] = ts
+            if row["LastSeen"] is None or ts > row["LastSeen"]:
+                row["LastSeen"] = ts
+    rows = sorted(table.values(), key=lambda r: r["Count"], reverse=True)
+    for row in rows:
+        row["Sample"] = row["Sample"].RawLine
+        if not row["Message"]:
+            row["Message"] = row["Sample"].split("\n", 1)[0]
+    try:
+        with open(ERROR_FINGERPRINTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=1, default=str)
+    except OSError as e:
+        logging.warning(f"⚠️ Nie można zapisać {ERROR_FINGERPRINTS_FILE}: {e}")
+    logging.info(f"🧬 Unikalne problemy (fingerprinty): {len(rows)}")
+    return rows
+
+# Analiza logów jednego serwera (osobny proces dla każdego serwera)
+# Zwijanie powtórzeń przy wczytywaniu: kolejne linie o identycznym szablonie (tekst bez znacznika
+# czasu, cyfry zastąpione '#') stają się jednym zdarzeniem z licznikiem Count i czasem ostatniego
+# powtórzenia. Serie nie przekraczają granicy minuty, więc agregaty minutowe/godzinowe ważone Count
+# są dokładne. Zwijane są tylko typy bez danych liczbowych i poza błędami/ostrzeżeniami.
+RLE_EVENT_TYPES = {"other", "info_add", "system_info", "direct_storage", "forestry_helper", "real_dirt_color"}
+RLE_WINDOW = 2
+RLE_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}\s*")
+RLE_DIGITS_RE = re.compile(r"\d+")
+
+def rle_template(line):
+    return RLE_DIGITS_RE.sub("#", RLE_TIMESTAMP_RE.sub("", line.strip()))
+
+def weighted_size(frame, by):
+    # Odpowiednik groupby(...).size() liczący linie logu, a nie zwinięte zdarzenia
+    if "Count" not in frame.columns:
+        return frame.groupby(by).size()
+    return frame.groupby(by)["Count"].sum()
+
+def event_weight(frame):
+    return int(frame["Count"].sum()) if "Count" in frame.columns else len(frame)
+
+# Grupy godzinowe tabeli zdarzeń (etykieta godziny, dzień, godzina doby): w potoku liczone raz
+# dla całej tabeli, podzbiory (zapisy, ostrzeżenia) wybierają swoje wiersze po indeksie
+def hour_groups(df):
+    hour = df["Timestamp"].dt.strftime("%Y-%m-%d %H:00")
+    return pd.DataFrame({"Hour": hour, "Day": df["Timestamp"].dt.date, "HourOfDay": hour.str.slice(11)}, index=df.index)
+
+def frame_hours(frame, hours=None):
+    return hour_groups(frame) if hours is None else hours.loc[frame.index]
+
+# Parsowanie bloku pliku logu (całego pliku albo fragmentu od punktu kontrolnego indeksu czasu);
+# base_offset to pozycja bloku w pliku, więc Offset zdarzeń pozostaje bezwzględny
+def parse_log_block(server_name, fname, data, base_offset=0, last_ts=None):
+    events = []
+    event_counts = Counter()
+    unparsed_lines = 0
+    collapsed_lines = 0
+    lines = data.split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    offset = base_offset
+    open_error = None
+    open_line = None
+    # Otwarte serie powtórzeń: szablon -> (zdarzenie, minuta); ABAB zwija się do A i B przy RLE_WINDOW = 2
+    open_runs = {}
+    for raw in lines:
+        line_offset = offset
+        offset += len(raw) + 1
+        line = raw.decode("utf-8", errors="replace")
+        if open_error is not None:
+            if CONTINUATION_RE.match(line):
+                attach_continuation(open_error, line, offset - 1)
+                continue
+            finalize_error_group(open_error, open_line)
+            open_error = None
+        parsed = parse_line(line)
+        if parsed:
+            event = Event.from_entry(parsed, server_name, fname, line_offset, len(raw))
+            if event.EventType == "script_error" and events and is_bare_timestamp(events[-1], line_offset):
+                stamp = events.pop()
+                event_counts[stamp.EventType] -= 1
+                event.Timestamp = stamp.Timestamp
+                event.Offset = stamp.Offset
+                event.Length = line_offset + len(raw) - stamp.Offset
+            if event.Timestamp is None:
+                event.Timestamp = last_ts
+                event.Inferred = True
+            else:
+                last_ts = event.Timestamp
+            event_counts[event.EventType] += 1
+            if event.EventType in RLE_EVENT_TYPES and event.LineType not in ("ERROR", "WARNING") and event.Timestamp is not None:
+                template = rle_template(line)
+                minute = event.Timestamp.replace(second=0, microsecond=0)
+                run = open_runs.get(template)
+                if run is not None and run[1] == minute and run[0].EventType == event.EventType:
+                    run[0].Count += 1
+                    run[0].LastTimestamp = event.Timestamp
+                    collapsed_lines += 1
+                    continue
+                open_runs[template] = (event, minute)
+                if len(open_runs) > RLE_WINDOW:
+                    del open_runs[next(iter(open_runs))]
+            else:
+                open_runs.clear()
+            events.append(event)
+            if event.LineType in ("ERROR", "WARNING"):
+                open_error = event
+                open_line = line
+        else:
+            unparsed_lines += 1
+    if open_error is not None:
+        finalize_error_group(open_error, open_line)
+    return events, event_counts, len(lines), unparsed_lines, collapsed_lines
+
+def analyze_server_logs(server_name):
+    events = []
+    total_lines = 0
+    unparsed_lines = 0
+    collapsed_lines = 0
+    event_counts = Counter()
+    log_dir = namespace_dir(server_name)
+    for fname in sorted(os.listdir(log_dir)):
+        if fname.endswith(".txt"):
+            logging.info(f"🔍 Analizuję [{server_name}]: {fname}")
+            with open(os.path.join(log_dir, fname), "rb") as f:
+                data = f.read()
+            # Linie bez znacznika czasu dziedziczą ostatni znacznik z pliku (na początku: czas startu z nazwy pliku)
+            file_events, file_counts, lines, unparsed, collapsed = parse_log_block(server_name, fname, data, 0, boot_time_from_filename(fname))
+            events.extend(file_events)
+            event_counts.update(file_counts)
+            total_lines += lines
+            unparsed_lines += unparsed
+            collapsed_lines += collapsed
+            logging.info(f"📄 Plik [{server_name}] {fname}: {sum(file_counts.values())} zdarzeń")
+    if collapsed_lines:
+        logging.info(f"🗜️ [{server_name}] Zwinięto {collapsed_lines} powtórzonych linii ({len(events)} zdarzeń zamiast {len(events) + collapsed_lines}).")
+    return server_name, events, event_counts, total_lines, unparsed_lines
+
+# Analiza wszystkich serwerów - każdy serwer parsowany niezależnie, równolegle
+def analyze_logs(namespaces=None):
     try:
+        namespaces = namespaces if namespaces is not None else discover_namespaces([])
         events = []
         total_lines = 0
         unparsed_lines = 0
         event_counts = Counter()
-        for fname in os.listdir(LOG_DIR):
-            if fname.endswith(".txt"):
-                logging.info(f"🔍 Analizuję: {fname}")
-                file_events = 0
-                with open(os.path.join(LOG_DIR, fname), "r", encoding="utf-8", errors="replace") as f:
-                    lines = f.readlines()
-                    total_lines += len(lines)
-                    for line in lines:
-                        parsed = parse_line(line)
-                        if parsed:
-                            events.append(parsed)
-                            event_counts[parsed["EventType"]] += 1
-                            file_events += 1
-                        else:
-                            unparsed_lines += 1
-                logging.info(f"📄 Plik {fname}: {file_events} zdarzeń")
+        if len(namespaces) > 1:
+            workers = min(len(namespaces), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(analyze_server_logs, namespaces))
+        else:
+            results = [analyze_server_logs(name) for name in namespaces]
+
+        for server_name, server_events, server_counts, server_lines, server_unparsed in results:
+            events.extend(server_events)
+            event_counts.update(server_counts)
+            total_lines += server_lines
+            unparsed_lines += server_unparsed
+            logging.info(f"🖥️ Serwer {server_name}: {len(server_events)} zdarzeń z {server_lines} linii.")
         logging.info(f"📊 Zebrano {len(events)} zdarzeń z {total_lines} linii. Nieparsowanych linii: {unparsed_lines}.")
         logging.info("📈 Rozkład typów zdarzeń:")
         for etype, count in event_counts.items():
@@ -299,10 +752,744 @@ def analyze_logs():
         logging.error(f"❌ Błąd analizy logów: {e}")
         return [], Counter()
 
+# Profiler klasyfikatora EVENTS (--profile-patterns): w trybie profilowania każda linia jest sprawdzana
+# wszystkimi wzorcami, żeby znać zarówno koszt w obecnej kolejności (pierwsze dopasowanie wygrywa),
+# jak i zbiór wzorców pasujących do linii - z niego liczona jest bezpieczna zmiana kolejności
+PATTERN_PROFILE = None
+PROFILE_COST_RATIO = 3.0
+
+def new_pattern_profile():
+    return {
+        "patterns": {etype: {"attempts": 0, "hits": 0, "time_ns": 0, "evaluations": 0, "matches": 0, "eval_ns": 0} for etype in EVENTS},
+        "signatures": Counter(),
+    }
+
+# Linia przychodzi z parse_line już przycięta do LINE_MAX_CHARS; wzorzec odrzucony testem literałów
+# kosztuje tylko ten test (jak w parse_line) i nie jest dopasowywany
+def profile_line(line, lowered):
+    matched = []
+    for etype, pattern in EVENTS.items():
+        started = time.perf_counter_ns()
+        hit = not literal_miss(etype, lowered) and re.search(pattern, line, re.IGNORECASE) is not None
+        elapsed = time.perf_counter_ns() - started
+        stats = PATTERN_PROFILE["patterns"][etype]
+        stats["evaluations"] += 1
+        stats["eval_ns"] += elapsed
+        if not matched:
+            stats["attempts"] += 1
+            stats["time_ns"] += elapsed
+            if hit:
+                stats["hits"] += 1
+        if hit:
+            stats["matches"] += 1
+            matched.append(etype)
+    PATTERN_PROFILE["signatures"][tuple(matched)] += 1
+
+def first_match(signature, order):
+    members = set(signature)
+    return next((etype for etype in order if etype in members), None)
+
+def expected_cost(signatures, order, avg_ns):
+    total = 0.0
+    for signature, count in signatures.items():
+        winner = first_match(signature, order)
+        for etype in order:
+            total += avg_ns[etype] * count
+            if etype == winner:
+                break
+    return total
+
+def suggest_pattern_order(signatures, avg_ns, lines):
+    order = list(EVENTS)
+    # Wzorzec A musi zostać przed B, jeśli jakaś linia pasowała do obu (A wygrywa w obecnej kolejności)
+    after = {etype: set() for etype in order}
+    blockers = Counter()
+    for signature in signatures:
+        for i, first in enumerate(signature):
+            for second in signature[i + 1:]:
+                if second not in after[first]:
+                    after[first].add(second)
+                    blockers[second] += 1
+    # Kahn z kolejką priorytetową: najpierw najniższy koszt na trafienie (koszt / prawdopodobieństwo)
+    def priority(etype):
+        matches = sum(count for signature, count in signatures.items() if etype in signature)
+        return (avg_ns[etype] * lines / matches if matches else float("inf"), order.index(etype))
+    heap = [(priority(etype), etype) for etype in order if blockers[etype] == 0]
+    heapq.heapify(heap)
+    suggested = []
+    while heap:
+        _, etype = heapq.heappop(heap)
+        suggested.append(etype)
+        for nxt in after[etype]:
+            blockers[nxt] -= 1
+            if blockers[nxt] == 0:
+                heapq.heappush(heap, (priority(nxt), nxt))
+    return suggested
+
+def run_pattern_profile(namespaces):
+    global PATTERN_PROFILE
+    try:
+        PATTERN_PROFILE = new_pattern_profile()
+        started = time.perf_counter()
+        for name in namespaces:
+            analyze_server_logs(name)
+        elapsed = time.perf_counter() - started
+        profile, PATTERN_PROFILE = PATTERN_PROFILE, None
+
+        signatures = profile["signatures"]
+        lines = sum(signatures.values())
+        total_ns = sum(stats["time_ns"] for stats in profile["patterns"].values()) or 1
+        total_hits = sum(stats["hits"] for stats in profile["patterns"].values()) or 1
+        avg_ns = {etype: stats["eval_ns"] / stats["evaluations"] if stats["evaluations"] else 0.0 for etype, stats in profile["patterns"].items()}
+        rows = []
+        for position, (etype, stats) in enumerate(profile["patterns"].items()):
+            time_share = stats["time_ns"] / total_ns
+            hit_share = stats["hits"] / total_hits
+            if stats["matches"] == 0:
+                status = "dead"
+            elif stats["hits"] == 0:
+                status = "shadowed"
+            elif hit_share == 0 or time_share / hit_share > PROFILE_COST_RATIO:
+                status = "costly"
+            else:
+                status = "ok"
+            rows.append({
+                "Position": position,
+                "Pattern": etype,
+                "Attempts": stats["attempts"],
+                "Hits": stats["hits"],
+                "HitRate": round(stats["hits"] / stats["attempts"], 4) if stats["attempts"] else 0.0,
+                "Matches": stats["matches"],
+                "TimeMs": round(stats["time_ns"] / 1e6, 2),
+                "TimeShare": round(time_share, 4),
+                "HitShare": round(hit_share, 4),
+                "AvgNs": round(avg_ns[etype], 1),
+                "Status": status,
+            })
+
+        current = list(EVENTS)
+        suggested = suggest_pattern_order(signatures, avg_ns, lines)
+        identical = all(first_match(signature, current) == first_match(signature, suggested) for signature in signatures)
+        current_cost = expected_cost(signatures, current, avg_ns)
+        suggested_cost = expected_cost(signatures, suggested, avg_ns)
+        result = {
+            "lines": lines,
+            "seconds": round(elapsed, 2),
+            "patterns": rows,
+            "current_order": current,
+            "suggested_order": suggested,
+            "suggested_identical": identical,
+            "current_ms": round(current_cost / 1e6, 1),
+            "suggested_ms": round(suggested_cost / 1e6, 1),
+            "overlaps": sorted([list(signature) for signature in signatures if len(signature) > 1], key=len, reverse=True)[:50],
+        }
+        with open(PATTERN_PROFILE_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+
+        logging.info(f"⏱️ Profil wzorców EVENTS ({lines} linii):")
+        logging.info(f"  {'#':>2} {'wzorzec':<24} {'próby':>8} {'trafienia':>9} {'%traf.':>7} {'czas ms':>9} {'%czasu':>7} {'ns/próbę':>9}  status")
+        for row in rows:
+            logging.info(f"  {row['Position']:>2} {row['Pattern']:<24} {row['Attempts']:>8} {row['Hits']:>9} {row['HitRate']:>7.1%} {row['TimeMs']:>9.1f} {row['TimeShare']:>7.1%} {row['AvgNs']:>9.0f}  {row['Status']}")
+        logging.info(f"⏱️ Sugerowana kolejność ({'wyniki identyczne' if identical else 'UWAGA: wyniki różne'}): {', '.join(suggested)}")
+        logging.info(f"⏱️ Szacowany czas dopasowań: {result['current_ms']} ms → {result['suggested_ms']} ms. Profil zapisany jako {PATTERN_PROFILE_FILE}")
+        return result
+    except Exception as e:
+        PATTERN_PROFILE = None
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w run_pattern_profile: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w run_pattern_profile: {e}")
+        return {}
+
+# Benchmark odporności klasyfikatora (--bench-patterns): złośliwe linie (długie serie spacji, wiele
+# znaczników czasu, brakujące zakończenia wzorców, binarne śmieci) w rosnących długościach plus
+# losowe sklejki fragmentów wzorców. Czas linii musi się wypłaszczyć powyżej LINE_MAX_CHARS
+BENCH_PATTERNS_FILE = os.path.join("logs", "bench_patterns.json")
+BENCH_SIZES = (256, 1024, LINE_MAX_CHARS, 4 * LINE_MAX_CHARS, 32 * LINE_MAX_CHARS)
+BENCH_GROWTH_MS = 1.0
+# Cel pomiaru (nie limit egzekwowany w parse_line): najwolniejsza linia w benchmarku
+BENCH_LINE_TARGET_MS = 50
+BENCH_FUZZ_LINES = 500
+BENCH_FUZZ_SEED = 25
+BENCH_TS = "2025-10-20 21:20:46.507"
+BENCH_FRAGMENTS = (
+    BENCH_TS, " ", "  ", "\t", "a", "Gracz", " joined the game", " left the game", "Warning: ", "Error: ",
+    " in mod '", "'", "(", " (", "1.5", " ms)", "FTG '", " max needed CPU instances = ", " MB / ",
+    "Available mod: (Hash: ", "abc123", ") (Version: ", "   Info: ", "[DirectStorage] ", "\x00", "�", "ł",
+)
+
+def adversarial_lines(length):
+    def fill(prefix, unit, suffix=""):
+        return prefix + unit * max(1, (length - len(prefix) - len(suffix)) // len(unit)) + suffix
+    return {
+        "spaces_after_name": fill(BENCH_TS + " a", " "),
+        "tabs_after_name": fill(BENCH_TS + " a", " \t", "x"),
+        "timestamps": fill("", BENCH_TS + " "),
+        "literal_before_timestamps": fill("x joined the game left the game (1 ms) ", BENCH_TS + " "),
+        "name_without_join": fill(BENCH_TS + " ", "a b "),
+        "open_parens": fill(BENCH_TS + " ", " (1"),
+        "unterminated_ms": fill(BENCH_TS + " (", "1."),
+        "repeated_in_mod": fill("Warning: ", "a in mod '"),
+        "l10n_without_quote": fill("Warning: Duplicate l10n entry '", "x in mod "),
+        "quotes": fill("Warning: x in mod '", "'"),
+        "ftg_quotes": fill(BENCH_TS + " FTG '", "'"),
+        "ftg_partial": fill(BENCH_TS + " FTG '", "' max needed CPU instances = 1"),
+        "hash_without_end": fill("Available mod: (Hash: ", "a"),
+        "binary": fill("", "\x00\xff�"),
+        "no_keyword": fill("", "z"),
+    }
+
+def time_parse_line(line, repeats=3):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        parse_line(line)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+def benchmark_patterns(namespaces):
+    try:
+        # Ostrzeżenia o przycinaniu długich linii są tu wyciszone - liczy się tylko czas
+        logging.disable(logging.WARNING)
+        try:
+            adversarial = {}
+            for length in BENCH_SIZES:
+                for name, line in adversarial_lines(length).items():
+                    adversarial.setdefault(name, {})[length] = round(time_parse_line(line, repeats=5), 3)
+
+            rng = random.Random(BENCH_FUZZ_SEED)
+            fuzz = []
+            for _ in range(BENCH_FUZZ_LINES):
+                parts = []
+                target = rng.choice(BENCH_SIZES)
+                while sum(len(part) for part in parts) < target:
+                    parts.append(rng.choice(BENCH_FRAGMENTS) * rng.choice((1, 1, 1, 8, 64)))
+                fuzz.append(time_parse_line("".join(parts), repeats=1))
+
+            real = []
+            for name in namespaces:
+                log_dir = namespace_dir(name)
+                for fname in sorted(os.listdir(log_dir)):
+                    if fname.endswith(".txt"):
+                        with open(os.path.join(log_dir, fname), "r", encoding="utf-8", errors="replace") as f:
+                            for line in f:
+                                real.append(time_parse_line(line, repeats=1))
+        finally:
+            logging.disable(logging.NOTSET)
+
+        worst_name, worst_times = max(adversarial.items(), key=lambda item: max(item[1].values()))
+        worst_ms = max(worst_times.values())
+        capped = {name: times[LINE_MAX_CHARS] for name, times in adversarial.items()}
+        largest = BENCH_SIZES[-1]
+        # Linia 32× dłuższa od limitu bez przycinania kosztowałaby ≥32× (kwadratowo ~1000×); z przycinaniem
+        # zostaje liniowy koszt strip() i szum pomiaru, stąd tolerancja 2× + BENCH_GROWTH_MS
+        growth = max(times[largest] / max(times[LINE_MAX_CHARS], 0.001) for times in adversarial.values())
+        flat = all(times[largest] <= 2 * times[LINE_MAX_CHARS] + BENCH_GROWTH_MS for times in adversarial.values())
+        real_sorted = sorted(real)
+        result = {
+            "line_max_chars": LINE_MAX_CHARS,
+            "target_ms": BENCH_LINE_TARGET_MS,
+            "adversarial_ms": adversarial,
+            "worst": {"line": worst_name, "ms": worst_ms},
+            "growth_above_cap": round(growth, 2),
+            "fuzz": {"lines": len(fuzz), "max_ms": round(max(fuzz), 3), "avg_ms": round(sum(fuzz) / len(fuzz), 3)},
+            "real": {
+                "lines": len(real),
+                "p50_ms": round(real_sorted[len(real) // 2], 4) if real else 0.0,
+                "p99_ms": round(real_sorted[int(len(real) * 0.99)], 4) if real else 0.0,
+                "max_ms": round(real_sorted[-1], 3) if real else 0.0,
+            },
+        }
+        result["bounded"] = max(worst_ms, result["fuzz"]["max_ms"], result["real"]["max_ms"]) <= BENCH_LINE_TARGET_MS and flat
+        with open(BENCH_PATTERNS_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+
+        logging.info(f"🧪 Złośliwe linie (ms na linię, długość → {', '.join(str(size) for size in BENCH_SIZES)}):")
+        for name, times in adversarial.items():
+            logging.info(f"  {name:<26} {' '.join(f'{times[size]:>8.2f}' for size in BENCH_SIZES)}")
+        logging.info(f"🧪 Najgorsza linia: {worst_name} ({worst_ms:.2f} ms), najwolniejsza przy {LINE_MAX_CHARS} znakach: {max(capped.values()):.2f} ms, wzrost powyżej limitu ×{result['growth_above_cap']}")
+        logging.info(f"🧪 Fuzz: {len(fuzz)} linii, maks. {result['fuzz']['max_ms']} ms; log_cache: {len(real)} linii, p50 {result['real']['p50_ms']} ms, p99 {result['real']['p99_ms']} ms, maks. {result['real']['max_ms']} ms")
+        if result["bounded"]:
+            logging.info(f"✅ Koszt linii płaski powyżej {LINE_MAX_CHARS} znaków, najwolniejsza poniżej {BENCH_LINE_TARGET_MS} ms. Wynik zapisany jako {BENCH_PATTERNS_FILE}")
+        else:
+            logging.warning(f"⚠️ Najwolniejsza linia powyżej {BENCH_LINE_TARGET_MS} ms lub brak wypłaszczenia powyżej limitu. Wynik zapisany jako {BENCH_PATTERNS_FILE}")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w benchmark_patterns: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w benchmark_patterns: {e}")
+        return {}
+
+# Benchmark pamięci: bajty na zdarzenie dla starej reprezentacji (słownik + kopia RawLine)
+# i zwartego rekordu Event, mierzone tracemalloc na całym log_cache
+def benchmark_event_memory(namespaces):
+    try:
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        legacy = []
+        for name in namespaces:
+            log_dir = namespace_dir(name)
+            for fname in sorted(os.listdir(log_dir)):
+                if fname.endswith(".txt"):
+                    with open(os.path.join(log_dir, fname), "r", encoding="utf-8", errors="replace") as f:
+                        for line in f:
+                            parsed = parse_line(line)
+                            if parsed:
+                                parsed["Server"] = name
+                                parsed["File"] = fname
+                                legacy.append(parsed)
+        legacy_bytes = tracemalloc.get_traced_memory()[0] - base
+        legacy_count = len(legacy)
+        del legacy
+        gc.collect()
+
+        base = tracemalloc.get_traced_memory()[0]
+        compact = []
+        for name in namespaces:
+            compact.extend(analyze_server_logs(name)[1])
+        compact_bytes = tracemalloc.get_traced_memory()[0] - base
+        compact_count = len(compact)
+        del compact
+        tracemalloc.stop()
+
+        result = {
+            "legacy": {"events": legacy_count, "bytes": legacy_bytes, "bytes_per_event": round(legacy_bytes / max(legacy_count, 1), 1)},
+            "compact": {"events": compact_count, "bytes": compact_bytes, "bytes_per_event": round(compact_bytes / max(compact_count, 1), 1)},
+        }
+        result["reduction"] = round(1 - compact_bytes / legacy_bytes, 3) if legacy_bytes else 0
+        with open(BENCH_MEMORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1)
+        logging.info(f"🧪 Pamięć zdarzeń (słowniki): {legacy_count} zdarzeń, {result['legacy']['bytes_per_event']} B/zdarzenie, razem {legacy_bytes / 1048576:.1f} MB")
+        logging.info(f"🧪 Pamięć zdarzeń (Event): {compact_count} zdarzeń, {result['compact']['bytes_per_event']} B/zdarzenie, razem {compact_bytes / 1048576:.1f} MB")
+        logging.info(f"🧪 Redukcja pamięci: {result['reduction'] * 100:.1f}%")
+        return result
+    except Exception as e:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w benchmark_event_memory: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w benchmark_event_memory: {e}")
+        return {}
+
+# Szybki tryb skanowania (tylko liczniki i agregaty godzinowe): plik mapowany przez mmap,
+# wzorce bajtowe uruchamiane bezpośrednio na buforze, dekodowane są tylko potrzebne pola.
+# Reguły grupowania są te same co w pełnej analizie: linie kontynuacji błędu nie są liczone,
+# a serie powtórzeń (RLE) są zwijane w "records" - liczniki typów i godzin liczą linie,
+# tak jak ważone Count agregaty raportu
+TIMESTAMP_B = re.compile(TIMESTAMP.pattern.encode("ascii"))
+EVENTS_B = [(etype, re.compile(pattern.encode("utf-8"), re.IGNORECASE), tuple(literal.encode("ascii") for literal in EVENT_LITERALS.get(etype, ())))
+            for etype, pattern in EVENTS.items()]
+CONTINUATION_B = re.compile(CONTINUATION_RE.pattern.encode("ascii"))
+BLANK_B = re.compile(rb"\s*$")
+BARE_TIMESTAMP_B = re.compile(rb"\s*" + BARE_TIMESTAMP_RE.pattern.encode("ascii") + rb"\s*$")
+# Szablon RLE liczony na bajtach (odpowiednik rle_template bez dekodowania linii)
+RLE_TIMESTAMP_B = re.compile(RLE_TIMESTAMP_RE.pattern.encode("ascii"))
+RLE_DIGITS_B = re.compile(RLE_DIGITS_RE.pattern.encode("ascii"))
+
+def line_type_bytes(buf, start, end):
+    if buf.find(b"INFO:", start, end) != -1:
+        return "INFO"
+    if buf.find(b"ADMIN:", start, end) != -1:
+        return "ADMIN"
+    if buf.find(b"ERROR:", start, end) != -1 or buf.find(b"Error", start, end) != -1:
+        return "ERROR"
+    if buf.find(b"WARNING:", start, end) != -1 or buf.find(b"Warning", start, end) != -1:
+        return "WARNING"
+    return "UNKNOWN"
+
+def scan_file_fast(path):
+    result = {"lines": 0, "events": 0, "records": 0, "unparsed": 0, "event_counts": Counter(), "line_types": Counter(), "hourly": Counter()}
+    if os.path.getsize(path) == 0:
+        return result
+    event_counts = result["event_counts"]
+    line_types = result["line_types"]
+    hourly = result["hourly"]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            size = len(mm)
+            pos = 0
+            in_error = False
+            boot_time = boot_time_from_filename(os.path.basename(path))
+            last_hour = boot_time.strftime("%Y-%m-%d %H:00") if boot_time else None
+            last_minute = boot_time.strftime("%Y-%m-%d %H:%M") if boot_time else None
+            # Otwarte serie powtórzeń jak w parse_log_block: szablon -> (typ, minuta)
+            open_runs = {}
+            # Koniec i godzina ostatniej zapisanej linii z samym znacznikiem czasu (dla script_error)
+            bare = None
+            while pos < size:
+                start = pos
+                end = mm.find(b"\n", start)
+                if end == -1:
+                    end = size
+                pos = end + 1
+                result["lines"] += 1
+                with view[start:min(end, start + LINE_MAX_CHARS)] as line:
+                    if in_error and CONTINUATION_B.match(line):
+                        continue
+                    if BLANK_B.match(line):
+                        result["unparsed"] += 1
+                        in_error = False
+                        continue
+                    etype = "other"
+                    # Wzorce bajtowe z IGNORECASE rozróżniają tylko litery ASCII, więc test literałów
+                    # na bytes.lower() jest tu dokładny dla każdej linii
+                    lowered = line.tobytes().lower()
+                    for name, pattern, literals in EVENTS_B:
+                        if literals and not any(literal in lowered for literal in literals):
+                            continue
+                        if pattern.search(line):
+                            etype = name
+                            break
+                    ts = TIMESTAMP_B.search(line)
+                    if ts:
+                        # Dekodujemy tylko "YYYY-MM-DD HH:MM" z dopasowanego znacznika czasu
+                        ts_start = start + ts.start()
+                        last_minute = mm[ts_start:ts_start + 16].decode("ascii")
+                        last_hour = last_minute[:13] + ":00"
+                    if last_hour:
+                        hourly[(last_hour, etype)] += 1
+                    stamp_only = etype == "other" and end - start < 32 and BARE_TIMESTAMP_B.match(line) is not None
+                ltype = "ERROR" if etype == "script_error" else line_type_bytes(mm, start, end)
+                if etype == "script_error" and bare is not None and bare[0] + 1 == start:
+                    # Jak w parse_log_block: linia "<czas> " staje się częścią nagłówka script_error
+                    event_counts["other"] -= 1
+                    line_types["UNKNOWN"] -= 1
+                    hourly[(bare[1], "other")] -= 1
+                    result["events"] -= 1
+                    result["records"] -= 1
+                event_counts[etype] += 1
+                line_types[ltype] += 1
+                result["events"] += 1
+                in_error = ltype in ("ERROR", "WARNING")
+                if etype in RLE_EVENT_TYPES and not in_error and last_minute is not None:
+                    template = RLE_DIGITS_B.sub(b"#", RLE_TIMESTAMP_B.sub(b"", mm[start:end].strip()))
+                    run = open_runs.get(template)
+                    if run is not None and run == (etype, last_minute):
+                        continue
+                    open_runs[template] = (etype, last_minute)
+                    if len(open_runs) > RLE_WINDOW:
+                        del open_runs[next(iter(open_runs))]
+                else:
+                    open_runs.clear()
+                result["records"] += 1
+                bare = (end, last_hour) if stamp_only and ltype == "UNKNOWN" else None
+        finally:
+            view.release()
+    return result
+
+def fast_scan_server(server_name):
+    totals = {"lines": 0, "events": 0, "records": 0, "unparsed": 0, "event_counts": Counter(), "line_types": Counter(), "hourly": Counter()}
+    log_dir = namespace_dir(server_name)
+    for fname in sorted(os.listdir(log_dir)):
+        if fname.endswith(".txt"):
+            part = scan_file_fast(os.path.join(log_dir, fname))
+            for key in ("lines", "events", "records", "unparsed"):
+                totals[key] += part[key]
+            for key in ("event_counts", "line_types", "hourly"):
+                totals[key].update(part[key])
+    return server_name, totals
+
+def run_fast_scan(namespaces):
+    try:
+        if len(namespaces) > 1:
+            with ProcessPoolExecutor(max_workers=min(len(namespaces), os.cpu_count() or 1)) as pool:
+                results = list(pool.map(fast_scan_server, namespaces))
+        else:
+            results = [fast_scan_server(name) for name in namespaces]
+        summary = {}
+        for server_name, totals in results:
+            per_hour = Counter()
+            for (hour, _), count in totals["hourly"].items():
+                per_hour[hour] += count
+            summary[server_name] = {
+                "lines": totals["lines"],
+                "events": totals["events"],
+                "records": totals["records"],
+                "unparsed": totals["unparsed"],
+                "event_counts": dict(totals["event_counts"].most_common()),
+                "line_types": dict(totals["line_types"].most_common()),
+                "events_per_hour": dict(sorted(per_hour.items())),
+            }
+            logging.info(f"⚡ [{server_name}] {totals['events']} zdarzeń z {totals['lines']} linii, {totals['records']} rekordów po zwinięciu powtórzeń (szybkie skanowanie).")
+            for etype, count in totals["event_counts"].most_common():
+                logging.info(f"  - {etype}: {count}")
+        with open(FAST_SCAN_FILE, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1)
+        logging.info(f"⚡ Wynik szybkiego skanowania zapisany jako {FAST_SCAN_FILE}")
+        return summary
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w run_fast_scan: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w run_fast_scan: {e}")
+        return {}
+
+# Indeks czasu plików logów (logs/time_index.json): dla każdego pliku czas startu, pierwszy i ostatni
+# znacznik czasu, liczba linii i punkty kontrolne [znacznik, offset, nr linii] co TIME_INDEX_STEP_MINUTES.
+# Pliki logów tylko rosną, więc indeks jest dopisywany od ostatniej pełnej linii; inny początek pliku
+# (skrót pierwszych bajtów) albo krótszy plik wymusza indeksowanie od zera. Punkt kontrolny nigdy
+# nie wypada na linii kontynuacji, żeby blok czytany od niego nie zaczynał się w środku błędu
+TIME_INDEX_STEP_MINUTES = 10
+TIME_INDEX_HEAD_BYTES = 4096
+RANGE_TOP_PROBLEMS = 20
+
+def timestamp_text(moment):
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")[:23]
+
+def next_checkpoint_mark(text):
+    moment = parse_timestamp(text)
+    floored = moment.replace(minute=moment.minute - moment.minute % TIME_INDEX_STEP_MINUTES, second=0, microsecond=0)
+    return timestamp_text(floored + timedelta(minutes=TIME_INDEX_STEP_MINUTES))
+
+def index_log_file(path, fname, entry=None):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = hashlib.sha1(f.read(TIME_INDEX_HEAD_BYTES)).hexdigest()
+        if entry is None or entry.get("Head") != head or entry.get("Indexed", 0) > size:
+            boot = boot_time_from_filename(fname)
+            entry = {"Head": head, "Size": 0, "Indexed": 0, "IndexedLines": 0, "Lines": 0, "Boot": timestamp_text(boot) if boot else None, "First": None, "Last": None, "Checkpoints": []}
+        elif entry["Size"] == size:
+            return entry, False
+        f.seek(entry["Indexed"])
+        data = f.read()
+    checkpoints = entry["Checkpoints"]
+    mark = next_checkpoint_mark(checkpoints[-1][0]) if checkpoints else None
+    offset = entry["Indexed"]
+    line_no = entry["IndexedLines"]
+    lines = data.split(b"\n")
+    tail = lines.pop()
+    for raw in lines:
+        match = TIMESTAMP_B.search(raw)
+        if match:
+            text = match.group(1).decode("ascii")
+            if entry["First"] is None:
+                entry["First"] = text
+            if entry["Last"] is None or text > entry["Last"]:
+                entry["Last"] = text
+            if (mark is None or text >= mark) and not CONTINUATION_B.match(raw):
+                checkpoints.append([text, offset, line_no])
+                mark = next_checkpoint_mark(text)
+        offset += len(raw) + 1
+        line_no += 1
+    entry["Indexed"] = offset
+    entry["IndexedLines"] = line_no
+    entry["Lines"] = line_no + (1 if tail else 0)
+    entry["Size"] = size
+    return entry, True
+
+def update_time_index(namespaces):
+    try:
+        try:
+            with open(TIME_INDEX_FILE, "r", encoding="utf-8") as f:
+                old_index = json.load(f)
+        except (OSError, ValueError):
+            old_index = {}
+        index = {}
+        updated = 0
+        for name in namespaces:
+            log_dir = namespace_dir(name)
+            for fname in sorted(os.listdir(log_dir)):
+                if fname.endswith(".txt"):
+                    key = f"{name}/{fname}"
+                    index[key], changed = index_log_file(os.path.join(log_dir, fname), fname, old_index.get(key))
+                    updated += changed
+        # Pliki usunięte przez retencję znikają z indeksu razem z kluczem
+        if updated or set(index) != set(old_index):
+            with open(TIME_INDEX_FILE, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+        logging.info(f"🗂️ Indeks czasu: {len(index)} plików, zaktualizowano {updated}.")
+        return index
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w update_time_index: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w update_time_index: {e}")
+        return {}
+
+def range_block(entry, since_text, until_text):
+    # Początek: ostatni punkt kontrolny nie późniejszy niż since; koniec: pierwszy punkt po until
+    start = 0
+    start_text = None
+    end = entry["Size"]
+    for text, offset, _ in entry["Checkpoints"]:
+        if since_text and text <= since_text:
+            start = offset
+            start_text = text
+        elif until_text and text > until_text:
+            end = offset
+            break
+    return start, max(start, end), start_text
+
+def run_range_analysis(namespaces, since=None, until=None):
+    try:
+        since = pd.Timestamp(since).to_pydatetime() if since else None
+        until = pd.Timestamp(until).to_pydatetime() if until else None
+        since_text = timestamp_text(since) if since else None
+        until_text = timestamp_text(until) if until else None
+        index = update_time_index(namespaces)
+        events = []
+        files = {"total": 0, "read": 0, "skipped": 0}
+        size = {"total": 0, "read": 0}
+        started = time.perf_counter()
+        for name in namespaces:
+            log_dir = namespace_dir(name)
+            for fname in sorted(os.listdir(log_dir)):
+                entry = index.get(f"{name}/{fname}")
+                if not fname.endswith(".txt") or entry is None:
+                    continue
+                files["total"] += 1
+                size["total"] += entry["Size"]
+                first = entry["Boot"] or entry["First"]
+                last = entry["Last"] or first
+                if first is None or (since_text and last < since_text) or (until_text and first > until_text):
+                    files["skipped"] += 1
+                    continue
+                start, end, start_text = range_block(entry, since_text, until_text)
+                with open(os.path.join(log_dir, fname), "rb") as f:
+                    f.seek(start)
+                    data = f.read(end - start)
+                files["read"] += 1
+                size["read"] += len(data)
+                last_ts = parse_timestamp(start_text) if start_text else boot_time_from_filename(fname)
+                block_events = parse_log_block(name, fname, data, start, last_ts)[0]
+                events.extend(e for e in block_events if e.Timestamp is not None and (since is None or e.Timestamp >= since) and (until is None or e.Timestamp <= until))
+        elapsed = time.perf_counter() - started
+
+        df = events_frame(events)
+        problems = Counter()
+        samples = {}
+        for event in events:
+            fingerprint = event.Details.get("Fingerprint")
+            if fingerprint:
+                problems[fingerprint] += event.Count
+                samples.setdefault(fingerprint, event)
+        result = {
+            "Since": str(since) if since else None,
+            "Until": str(until) if until else None,
+            "Seconds": round(elapsed, 3),
+            "Files": files,
+            "Bytes": size,
+            "Events": event_weight(df) if not df.empty else 0,
+            "LineTypes": {k: int(v) for k, v in weighted_size(df, "LineType").sort_values(ascending=False).items()} if not df.empty else {},
+            "EventTypes": {k: int(v) for k, v in weighted_size(df, "EventType").sort_values(ascending=False).items()} if not df.empty else {},
+            "Servers": {k: int(v) for k, v in weighted_size(df, "Server").items()} if not df.empty else {},
+            "Players": [
+                {"Timestamp": str(e.Timestamp), "Server": e.Server, "Player": e.Details.get("PlayerName"), "Event": e.EventType}
+                for e in events if e.EventType in ("player_connected", "player_disconnected")
+            ],
+            "TopProblems": [
+                {"Fingerprint": fp, "Count": count, "LineType": samples[fp].LineType, "Message": samples[fp].Details.get("ScriptError") or samples[fp].Details.get("Message") or samples[fp].RawLine.split("\n", 1)[0]}
+                for fp, count in problems.most_common(RANGE_TOP_PROBLEMS)
+            ],
+        }
+        with open(RANGE_REPORT_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1, default=str)
+        logging.info(f"🕒 Zakres {since or '…'} - {until or '…'}: {result['Events']} zdarzeń w {elapsed:.2f} s; przeczytano {files['read']} z {files['total']} plików, {size['read'] / 1048576:.2f} z {size['total'] / 1048576:.2f} MB.")
+        for line_type, count in result["LineTypes"].items():
+            logging.info(f"  - {line_type}: {count}")
+        for row in result["TopProblems"][:5]:
+            logging.info(f"  ❗ {row['Count']}× {row['Message']}")
+        logging.info(f"🕒 Raport zakresu zapisany jako {RANGE_REPORT_FILE}")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w run_range_analysis: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w run_range_analysis: {e}")
+        return {}
+
+# Przypisanie błędów i ostrzeżeń do modów: automat Aho-Corasick z nazw modów (mod_load oraz
+# "in mod '...'"), każdy blok błędu (z liniami kontynuacji) skanowany raz, liniowo względem długości
+# tekstu niezależnie od liczby modów. Dopasowanie liczy się tylko na granicy identyfikatora, żeby
+# FS25_NewHolland nie trafiał w ścieżkę .../mods/FS25_NewHolland_648/...
+MOD_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_")
+# Wykres pokazuje mody z największą liczbą problemów, tabela wszystkie
+MOD_ISSUES_CHART_TOP = 40
+
+def build_mod_automaton(names):
+    goto = [{}]
+    output = [[]]
+    for name in names:
+        node = 0
+        for ch in name.lower():
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                output.append([])
+            node = nxt
+        output[node].append(name)
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for node in queue:
+        for ch, child in goto[node].items():
+            queue.append(child)
+            state = fail[node]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            fail[child] = goto[state].get(ch, 0)
+            output[child] = output[child] + output[fail[child]]
+    return goto, fail, output
+
+def scan_mods(automaton, text):
+    goto, fail, output = automaton
+    text = text.lower()
+    found = set()
+    node = 0
+    for i, ch in enumerate(text):
+        while node and ch not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(ch, 0)
+        for name in output[node]:
+            start = i - len(name) + 1
+            if (start == 0 or text[start - 1] not in MOD_NAME_CHARS) and (i + 1 == len(text) or text[i + 1] not in MOD_NAME_CHARS):
+                found.add(name)
+    return found
+
+def attribute_mod_issues(events):
+    try:
+        # Nazwa w małych literach -> pisownia z mod_load (pierwszeństwo) albo z "in mod '...'"
+        names = {}
+        issues = {}
+        for event in events:
+            if event.EventType == "mod_load" and event.Details.get("Name"):
+                name = MOD_REVISION_RE.sub("", event.Details["Name"])
+                names[name.lower()] = name
+            elif event.LineType in ("ERROR", "WARNING"):
+                issues.setdefault((event.Server, event.File), []).append(event)
+                if event.Details.get("Mod"):
+                    names.setdefault(event.Details["Mod"].lower(), event.Details["Mod"])
+        if not names:
+            return Counter()
+        automaton = build_mod_automaton(sorted(names.values()))
+        mod_issues = Counter()
+        attributed = 0
+        for (server, fname), file_events in issues.items():
+            with open(os.path.join(namespace_dir(server), fname), "rb") as f:
+                data = f.read()
+            for event in file_events:
+                text = data[event.Offset:event.Offset + event.Length].decode("utf-8", errors="replace")
+                mods = scan_mods(automaton, text)
+                if event.Details.get("Mod"):
+                    mods.add(names[event.Details["Mod"].lower()])
+                for mod in mods:
+                    mod_issues[mod] += event.Count
+                if mods:
+                    attributed += event.Count
+        total = sum(event.Count for file_events in issues.values() for event in file_events)
+        logging.info(f"🛠️ Przypisano {attributed} z {total} błędów/ostrzeżeń do {len(mod_issues)} modów (automat z {len(names)} nazw, {len(automaton[0])} stanów).")
+        return Counter(dict(mod_issues.most_common()))
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w attribute_mod_issues: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w attribute_mod_issues: {e}")
+        return Counter()
+
 # Statystyki błędów, ostrzeżeń i admina
-def detect_errors_and_stats(events):
+def detect_errors_and_stats(events, df=None):
     try:
-        df = pd.DataFrame(events)
+        if df is None:
+            df = events_frame(events)
         errors = df[df["LineType"] == "ERROR"]
         warnings = df[df["LineType"] == "WARNING"]
         
@@ -313,7 +1500,7 @@ def detect_errors_and_stats(events):
         for typ, count in warning_types.items():
             logging.info(f"  - {typ}: {count}")
         
-        mod_issues = Counter(w["Details"].get("Mod", "Unknown") for _, w in warnings.iterrows() if isinstance(w["Details"], dict) and "Mod" in w["Details"])
+        mod_issues = attribute_mod_issues(events)
         if mod_issues:
             logging.info("🛠️ Mody z problemami:")
             for mod, count in mod_issues.items():
@@ -323,7 +1510,7 @@ def detect_errors_and_stats(events):
         dlcs = df[df["EventType"] == "dlc_load"]
         logging.info(f"📦 Załadowano {len(mods)} modów i {len(dlcs)} DLC.")
 
-        sessions_df, admin_cmds = admin_player_stats(events)
+        sessions_df, admin_cmds = admin_player_stats(events, df)
         
         return errors, warnings, warning_types, mod_issues, sessions_df, admin_cmds
     except Exception as e:
@@ -333,10 +1520,11 @@ def detect_errors_and_stats(events):
         return pd.DataFrame(), pd.DataFrame(), Counter(), Counter(), pd.DataFrame(), pd.DataFrame()
 
 # Statystyki admina i graczy
-def admin_player_stats(events):
+def admin_player_stats(events, df=None):
     try:
-        df = pd.DataFrame(events)
-        df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+        if df is None:
+            df = events_frame(events)
+            df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
 
         connects = df[df["EventType"] == "player_connected"].sort_values("Timestamp")
         disconnects = df[df["EventType"] == "player_disconnected"].sort_values("Timestamp")
@@ -348,29 +1536,33 @@ def admin_player_stats(events):
             player = event["Details"].get("PlayerName", None) if isinstance(event["Details"], dict) else parse_details(event["Details"]).get("PlayerName", None)
             if not player:
                 continue
+            server = event.get("Server", "default")
+            key = (server, player)
 
             if event["EventType"] == "player_connected":
-                if player not in active_connections:
-                    active_connections[player] = event["Timestamp"]
+                if key not in active_connections:
+                    active_connections[key] = event["Timestamp"]
                 else:
                     logging.warning(f"⚠️ Gracz {player} już połączony w czasie {event['Timestamp']}, ignoruję powtórne połączenie.")
             elif event["EventType"] == "player_disconnected":
-                if player in active_connections:
-                    start_time = active_connections.pop(player)
+                if key in active_connections:
+                    start_time = active_connections.pop(key)
                     duration = (event["Timestamp"] - start_time).total_seconds() / 60
                     if duration > 1440:
                         logging.warning(f"⚠️ Sesja gracza {player} przekroczyła 24h ({duration:.2f} min), ograniczam do 1440 min.")
                         duration = 1440
                     sessions.append({
+                        "Server": server,
                         "Player": player,
                         "Start": start_time,
                         "End": event["Timestamp"],
                         "Duration": duration
                     })
 
-        for player, start_time in active_connections.items():
-            logging.warning(f"⚠️ Gracz {player} nie ma disconnect, połączenie od {start_time}.")
+        for (server, player), start_time in active_connections.items():
+            logging.warning(f"⚠️ Gracz {player} ({server}) nie ma disconnect, połączenie od {start_time}.")
             sessions.append({
+                "Server": server,
                 "Player": player,
                 "Start": start_time,
                 "End": None,
@@ -402,28 +1594,194 @@ def admin_player_stats(events):
         logging.error(f"❌ Błąd w admin_player_stats: {e}")
         return pd.DataFrame(), pd.DataFrame()
 
+# Indeks przedziałów sesji (drzewo przedziałów): kto był online w chwili T / w zakresie czasu
+def session_intervals(sessions_df, df=None):
+    if sessions_df is None or sessions_df.empty:
+        return []
+    last_seen = {}
+    if df is not None and not df.empty:
+        last_seen = df.dropna(subset=["Timestamp"]).groupby("Server")["Timestamp"].max().to_dict()
+    intervals = []
+    for row in sessions_df.itertuples(index=False):
+        start = row.Start
+        if pd.isna(start):
+            continue
+        end = row.End
+        if pd.isna(end):
+            # Sesja bez disconnect trwa do ostatniego zdarzenia serwera
+            end = last_seen.get(row.Server, start)
+        start, end = pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()
+        if end < start:
+            end = start
+        intervals.append((start, end, row.Server, row.Player))
+    return intervals
+
+def build_interval_tree(intervals):
+    if not intervals:
+        return None
+    points = sorted(p for iv in intervals for p in (iv[0], iv[1]))
+    center = points[len(points) // 2]
+    # Środek jest końcem jednego z przedziałów, więc węzeł nigdy nie jest pusty
+    left, right, here = [], [], []
+    for iv in intervals:
+        if iv[1] < center:
+            left.append(iv)
+        elif iv[0] > center:
+            right.append(iv)
+        else:
+            here.append(iv)
+    return {
+        "center": center,
+        "by_start": sorted(here, key=lambda iv: iv[0]),
+        "by_end": sorted(here, key=lambda iv: iv[1], reverse=True),
+        "left": build_interval_tree(left),
+        "right": build_interval_tree(right),
+    }
+
+def query_range(tree, start, end):
+    # Sesje nachodzące na [start, end] (dla start == end: sesje trwające w chwili start)
+    found = []
+    stack = [tree] if tree else []
+    while stack:
+        node = stack.pop()
+        if end < node["center"]:
+            for iv in node["by_start"]:
+                if iv[0] > end:
+                    break
+                found.append(iv)
+            if node["left"]:
+                stack.append(node["left"])
+        elif start > node["center"]:
+            for iv in node["by_end"]:
+                if iv[1] < start:
+                    break
+                found.append(iv)
+            if node["right"]:
+                stack.append(node["right"])
+        else:
+            found.extend(node["by_start"])
+            if node["left"]:
+                stack.append(node["left"])
+            if node["right"]:
+                stack.append(node["right"])
+    return sorted(found, key=lambda iv: (iv[0], iv[2], iv[3]))
+
+def query_point(tree, moment):
+    return query_range(tree, moment, moment)
+
+def concurrency_series(intervals):
+    # Jedno przejście po posortowanych końcach przedziałów: liczba graczy online po każdej zmianie
+    points = []
+    for start, end, server, player in intervals:
+        points.append((start, 1, server))
+        points.append((end, -1, server))
+    # Przy tym samym czasie najpierw rozłączenia, potem połączenia
+    points.sort(key=lambda p: (p[0], p[1]))
+    total, per_server, series = 0, Counter(), []
+    for moment, delta, server in points:
+        total += delta
+        per_server[server] += delta
+        series.append((moment, total, dict(per_server)))
+    return series
+
+def summarize_concurrency(intervals):
+    series = concurrency_series(intervals)
+    hourly, daily = {}, {}
+    current, hour_cursor = 0, None
+    for moment, total, _ in series:
+        hour = moment.replace(minute=0, second=0, microsecond=0)
+        # Godziny bez zmian dziedziczą liczbę graczy z poprzedniej zmiany
+        while hour_cursor is not None and hour_cursor < hour:
+            hour_cursor += timedelta(hours=1)
+            hourly.setdefault(hour_cursor, current)
+        hour_cursor = hour
+        hourly[hour] = max(hourly.get(hour, current), total)
+        day = moment.strftime("%Y-%m-%d")
+        if day not in daily:
+            daily[day] = {"Day": day, "Peak": current, "At": f"{day} 00:00:00"}
+        if total > daily[day]["Peak"]:
+            daily[day] = {"Day": day, "Peak": total, "At": moment.strftime("%Y-%m-%d %H:%M:%S")}
+        current = total
+    hours = sorted(hourly)
+    return {
+        "hourly": {"labels": [h.strftime("%Y-%m-%d %H:00") for h in hours], "data": [hourly[h] for h in hours]},
+        "daily": [daily[k] for k in sorted(daily)],
+    }
+
+def build_session_index(sessions_df, df=None):
+    try:
+        intervals = session_intervals(sessions_df, df)
+        tree = build_interval_tree(intervals)
+        concurrency = summarize_concurrency(intervals)
+        if concurrency["daily"]:
+            peak = max(concurrency["daily"], key=lambda r: r["Peak"])
+            logging.info(f"👥 Indeks sesji: {len(intervals)} przedziałów, szczyt {peak['Peak']} graczy online ({peak['At']}).")
+        return {"tree": tree, "intervals": intervals, "concurrency": concurrency}
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w build_session_index: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w build_session_index: {e}")
+        return {"tree": None, "intervals": [], "concurrency": {"hourly": {"labels": [], "data": []}, "daily": []}}
+
+def run_session_query(namespaces, online_at=None, online_between=None):
+    try:
+        events, _ = analyze_logs(namespaces)
+        sessions_df, _ = admin_player_stats(events)
+        index = build_session_index(sessions_df, events_frame(events))
+        if online_at:
+            start = end = pd.Timestamp(online_at).to_pydatetime()
+        else:
+            start, end = (pd.Timestamp(v).to_pydatetime() for v in online_between)
+        found = query_range(index["tree"], start, end) if index["tree"] else []
+        # Szczyt w zakresie liczony jednym przejściem po sesjach przyciętych do zakresu
+        clipped = [(max(iv[0], start), min(iv[1], end), iv[2], iv[3]) for iv in found]
+        peak = max((total for _, total, _ in concurrency_series(clipped)), default=0)
+        result = {
+            "From": str(start),
+            "To": str(end),
+            "Peak": peak,
+            "Sessions": [{"Server": iv[2], "Player": iv[3], "Start": str(iv[0]), "End": str(iv[1])} for iv in found],
+        }
+        logging.info(f"🔎 Gracze online {start} - {end}: {len(found)} sesji, szczyt {peak} graczy.")
+        for row in result["Sessions"]:
+            logging.info(f"  - [{row['Server']}] {row['Player']}: {row['Start']} → {row['End']}")
+        with open(SESSION_QUERY_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        logging.info(f"🔎 Wynik zapytania zapisany jako {SESSION_QUERY_FILE}")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w run_session_query: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w run_session_query: {e}")
+        return {}
+
 # Zapisane gry i dane do wykresów
-def handle_saves(events):
+def handle_saves(events, df=None, hours=None):
     try:
-        df = pd.DataFrame(events)
-        df_saves = df[df["EventType"] == "save_game"].sort_values("Timestamp")
+        if df is None:
+            df = events_frame(events)
+        df_saves = df[df["EventType"] == "save_game"]
+        # Linie rozpoczęcia zapisu nie są osobnym zapisem - liczymy tylko zakończenia
+        df_saves = df_saves[df_saves["Details"].map(lambda d: d.get("Phase") != "start")].sort_values("Timestamp")
         charts = {}
         if not df_saves.empty:
             logging.info(f"💾 Znaleziono {len(df_saves)} zapisów gry.")
             
-            df_saves["Count"] = 1
-            df_saves_per_hour = df_saves.groupby(df_saves["Timestamp"].dt.strftime("%Y-%m-%d %H:00"))["Count"].sum().reset_index()
+            groups = frame_hours(df_saves, hours)
+            if "Count" not in df_saves.columns:
+                df_saves["Count"] = 1
+            df_saves_per_hour = df_saves.groupby(groups["Hour"].rename("Timestamp"))["Count"].sum().reset_index()
             charts["saves_all"] = {
                 "labels": df_saves_per_hour["Timestamp"].tolist(),
                 "data": df_saves_per_hour["Count"].tolist()
             }
             logging.info(f"📊 Przygotowano dane saves_all: {len(charts['saves_all']['labels'])} etykiet, {len(charts['saves_all']['data'])} wartości")
 
-            df_saves["Day"] = df_saves["Timestamp"].dt.date
+            df_saves["Day"] = groups["Day"]
             for day in df_saves["Day"].unique():
                 df_day = df_saves[df_saves["Day"] == day].copy()
                 if not df_day.empty:
-                    df_day["Hour"] = df_day["Timestamp"].dt.strftime("%H:00")
+                    df_day["Hour"] = groups["HourOfDay"].loc[df_day.index]
                     saves_per_hour = df_day.groupby("Hour")["Count"].sum().reset_index()
                     charts[f"saves_{day}"] = {
                         "labels": saves_per_hour["Hour"].tolist(),
@@ -440,15 +1798,119 @@ def handle_saves(events):
         logging.error(f"❌ Błąd w handle_saves: {e}")
         return pd.DataFrame(), {}
 
+# Czas trwania zapisów gry i zacięcia zapisu. Gdy log ma linie rozpoczęcia i zakończenia, są parowane;
+# gdy ma tylko "Game saved successfully", czas autozapisu to nadwyżka odstępu między kolejnymi
+# autozapisami ponad interwał autozapisu danego uruchomienia (timer liczy od końca poprzedniego zapisu).
+# Taki czas jest szacunkiem: szum odstępów sięga ~20 s (p90 ~11 s na log_cache), więc zacięciem jest
+# dopiero szacunek powyżej SAVE_STALL_ESTIMATED_SECONDS albo jawne "Saving while already saving"
+SAVE_STALL_SECONDS = 10
+SAVE_STALL_ESTIMATED_SECONDS = 25
+SAVE_MAX_SECONDS = 300
+SAVE_INTERVAL_TOLERANCE = 30
+SAVE_OVERLAP_RE = re.compile(r"Saving while already saving", re.IGNORECASE)
+
+def autosave_interval(completions):
+    minutes = Counter(round((b - a).total_seconds() / 60) for a, b in zip(completions, completions[1:]))
+    minutes = [(m, c) for m, c in minutes.most_common() if m >= 5]
+    if not minutes or minutes[0][1] < 2:
+        return None
+    return minutes[0][0] * 60
+
+def save_percentiles(durations):
+    if not durations:
+        return {"P50": None, "P95": None, "Max": None}
+    values = np.array(durations)
+    return {"P50": round(float(np.percentile(values, 50)), 2), "P95": round(float(np.percentile(values, 95)), 2), "Max": round(float(values.max()), 2)}
+
+def track_save_operations(df):
+    result = {"saves": [], "stalls": [], "days": [], "boots": []}
+    try:
+        if df is None or df.empty:
+            return result
+        is_save = df["EventType"] == "save_game"
+        is_overlap = (df["LineType"] == "WARNING") & df["Details"].map(lambda d: bool(SAVE_OVERLAP_RE.search(str(d.get("Message", "")))))
+        df_saves = df[(is_save | is_overlap) & df["Timestamp"].notna()].sort_values("Timestamp", kind="stable")
+        saves, stalls = [], []
+        for (server, fname), group in df_saves.groupby(["Server", "File"], sort=True):
+            boot = boot_time_from_filename(fname)
+            boot_label = boot.strftime("%Y-%m-%d %H:%M:%S") if boot else fname
+            pending = None
+            completions = []
+            for ts, etype, details in zip(group["Timestamp"], group["EventType"], group["Details"]):
+                ts = ts.to_pydatetime()
+                if etype != "save_game":
+                    stalls.append({"Server": server, "Boot": boot_label, "Time": str(ts), "Kind": "overlap", "Seconds": None})
+                elif details.get("Phase") == "start":
+                    if pending is not None:
+                        stalls.append({"Server": server, "Boot": boot_label, "Time": str(pending), "Kind": "unfinished", "Seconds": None})
+                    pending = ts
+                else:
+                    duration = (ts - pending).total_seconds() if pending is not None else None
+                    completions.append({"Server": server, "Boot": boot_label, "Time": ts, "Duration": duration, "Source": "paired" if pending is not None else None})
+                    pending = None
+            if pending is not None:
+                stalls.append({"Server": server, "Boot": boot_label, "Time": str(pending), "Kind": "unfinished", "Seconds": None})
+
+            interval = autosave_interval([c["Time"] for c in completions])
+            anchor = None
+            for save in completions:
+                if save["Source"] is None and interval and anchor is not None:
+                    # Ręczne zapisy pomiędzy nie przesuwają timera autozapisu - liczymy od ostatniego autozapisu
+                    excess = (save["Time"] - anchor).total_seconds() - interval
+                    if 0 <= excess <= SAVE_MAX_SECONDS:
+                        save["Duration"], save["Source"] = round(excess, 3), "autosave"
+                    elif -SAVE_INTERVAL_TOLERANCE <= excess < 0 or excess > SAVE_MAX_SECONDS:
+                        # Autozapis bez wiarygodnego pomiaru (szum timera albo pauza pustego serwera) - tylko synchronizacja
+                        save["Source"] = "autosave"
+                if anchor is None or save["Source"] is not None:
+                    anchor = save["Time"]
+                save["Source"] = save["Source"] or "manual"
+                threshold = SAVE_STALL_SECONDS if save["Source"] == "paired" else SAVE_STALL_ESTIMATED_SECONDS
+                if save["Duration"] is not None and save["Duration"] > threshold:
+                    stalls.append({"Server": server, "Boot": boot_label, "Time": str(save["Time"]), "Kind": "long", "Seconds": round(save["Duration"], 1)})
+            saves.extend(completions)
+
+        def summarize(key):
+            rows = {}
+            for save in saves:
+                label = key(save)
+                row = rows.setdefault(label, {"Saves": 0, "durations": [], "Stalls": 0})
+                row["Saves"] += 1
+                if save["Duration"] is not None:
+                    row["durations"].append(save["Duration"])
+            return rows
+
+        days = summarize(lambda save: save["Time"].strftime("%Y-%m-%d"))
+        boots = summarize(lambda save: (save["Server"], save["Boot"]))
+        for stall in stalls:
+            days.setdefault(stall["Time"][:10], {"Saves": 0, "durations": [], "Stalls": 0})["Stalls"] += 1
+            boots.setdefault((stall["Server"], stall["Boot"]), {"Saves": 0, "durations": [], "Stalls": 0})["Stalls"] += 1
+        result["days"] = [{"Day": day, "Saves": row["Saves"], "Measured": len(row["durations"]), **save_percentiles(row["durations"]), "Stalls": row["Stalls"]} for day, row in sorted(days.items())]
+        result["boots"] = [{"Server": server, "Boot": boot, "Saves": row["Saves"], "Measured": len(row["durations"]), **save_percentiles(row["durations"]), "Stalls": row["Stalls"]} for (server, boot), row in sorted(boots.items())]
+        result["saves"] = [{**save, "Time": str(save["Time"])} for save in saves]
+        result["stalls"] = sorted(stalls, key=lambda stall: stall["Time"])
+        with open(SAVE_OPERATIONS_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        measured = [save["Duration"] for save in saves if save["Duration"] is not None]
+        overall = save_percentiles(measured)
+        logging.info(f"💾 Zapisy gry: {len(saves)} zakończonych, {len(measured)} z szacowanym czasem (p50 {overall['P50']} s, p95 {overall['P95']} s), {len(stalls)} zacięć.")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w track_save_operations: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w track_save_operations: {e}")
+        return result
+
 # Monitorowanie i predykcje
-def monitor_and_predict(warnings):
+def monitor_and_predict(warnings, hours=None):
     charts = {}
     try:
         if not warnings.empty:
-            df_warn = pd.DataFrame(warnings)
+            df_warn = warnings.copy()
             df_warn["Timestamp"] = pd.to_datetime(df_warn["Timestamp"], errors="coerce")
             df_warn = df_warn.dropna(subset=["Timestamp"]).sort_values("Timestamp")
-            df_warn["DateTime"] = df_warn["Timestamp"].dt.strftime("%Y-%m-%d %H:00")
+            groups = frame_hours(df_warn, hours)
+            df_warn["DateTime"] = groups["Hour"]
             warn_per_hour = df_warn.groupby("DateTime").size().reset_index(name="Count")
             
             if len(warn_per_hour) >= 2:
@@ -458,11 +1920,11 @@ def monitor_and_predict(warnings):
                 }
                 logging.info(f"📊 Przygotowano dane warnings_per_hour: {len(charts['warnings_per_hour']['labels'])} etykiet, {len(charts['warnings_per_hour']['data'])} wartości")
 
-                df_warn["Day"] = df_warn["Timestamp"].dt.date
+                df_warn["Day"] = groups["Day"]
                 for day in df_warn["Day"].unique():
                     df_day = df_warn[df_warn["Day"] == day].copy()
                     if not df_day.empty:
-                        df_day["Hour"] = df_day["Timestamp"].dt.strftime("%H:00")
+                        df_day["Hour"] = groups["HourOfDay"].loc[df_day.index]
                         warn_per_hour_day = df_day.groupby("Hour").size().reset_index(name="Count")
                         charts[f"warnings_per_hour_{day}"] = {
                             "labels": warn_per_hour_day["Hour"].tolist(),
@@ -482,10 +1944,242 @@ def monitor_and_predict(warnings):
         logging.error(f"❌ Błąd w monitor_and_predict: {e}")
         return {}
 
-# Eksport danych (tylko do pamięci, bez zapisu do plików)
-def export_data(events, sessions_df):
+# Wykrywanie anomalii na minutowych częstościach błędów/ostrzeżeń/rozłączeń.
+# Każda metryka ma przyrostową linię bazową: EWMA średniej i wariancji oraz sezonową
+# EWMA dla każdej godziny doby; aktualizacja O(1) na minutę, stan zapisywany między uruchomieniami
+ANOMALY_METRICS = ["errors", "warnings", "network", "disconnects"]
+NETWORK_EVENT_TYPES = ["network_decrypt_error", "network_unknown_target", "warning_stream"]
+ANOMALY_ALPHA = 0.05
+ANOMALY_SEASONAL_ALPHA = 0.02
+ANOMALY_WARMUP = 30
+ANOMALY_MIN_COUNT = 5
+ANOMALY_Z_WARNING = 4.0
+ANOMALY_Z_CRITICAL = 8.0
+ANOMALY_MAX_GAP = 60
+ANOMALY_BOOT_GRACE = 10
+
+def new_detector_state():
+    return {"mean": 0.0, "var": 0.0, "n": 0, "seasonal": [[0.0, 0.0, 0] for _ in range(24)]}
+
+def ewma_update(mean, var, value, alpha):
+    diff = value - mean
+    incr = alpha * diff
+    return mean + incr, (1 - alpha) * (var + diff * incr)
+
+def update_detector(state, hour, value):
+    seasonal = state["seasonal"][hour]
+    if seasonal[2] >= 60:
+        baseline = 0.5 * (state["mean"] + seasonal[0])
+        var = max(state["var"], seasonal[1])
+    else:
+        baseline = state["mean"]
+        var = state["var"]
+    z = (value - baseline) / ((var + 1.0) ** 0.5)
+    ready = state["n"] >= ANOMALY_WARMUP
+    state["mean"], state["var"] = ewma_update(state["mean"], state["var"], value, ANOMALY_ALPHA)
+    state["n"] += 1
+    seasonal[0], seasonal[1] = ewma_update(seasonal[0], seasonal[1], value, ANOMALY_SEASONAL_ALPHA)
+    seasonal[2] += 1
+    return (z if ready else 0.0), baseline
+
+def load_anomaly_state():
+    if os.path.exists(ANOMALY_STATE_FILE):
+        try:
+            with open(ANOMALY_STATE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️ Nie można wczytać {ANOMALY_STATE_FILE}: {e}")
+    return {}
+
+def minute_rates(df):
+    # Pierwsze minuty po starcie serwera (ładowanie modów) to zawsze lawina błędów - pomijamy je
+    boot_times = pd.to_datetime(df["File"].map({f: boot_time_from_filename(f) for f in df["File"].unique()}))
+    df = df[~((df["Timestamp"] - boot_times) < pd.Timedelta(minutes=ANOMALY_BOOT_GRACE))]
+    frame = pd.DataFrame({
+        "Server": df["Server"],
+        "Minute": df["Timestamp"].dt.floor("min"),
+        "errors": (df["LineType"] == "ERROR").astype(int),
+        "warnings": (df["LineType"] == "WARNING").astype(int),
+        "network": df["EventType"].isin(NETWORK_EVENT_TYPES).astype(int),
+        "disconnects": (df["EventType"] == "player_disconnected").astype(int),
+    }).dropna(subset=["Minute"])
+    return frame.groupby(["Server", "Minute"])[ANOMALY_METRICS].sum()
+
+def detect_anomalies(df, rebuild=False):
+    result = {"alerts": [], "new_alerts": 0, "buckets": 0}
+    try:
+        if df is None or df.empty:
+            return result
+        state = {} if rebuild else load_anomaly_state()
+        alerts = []
+        if not rebuild and os.path.exists(ANOMALY_ALERTS_FILE):
+            with open(ANOMALY_ALERTS_FILE, "r", encoding="utf-8") as f:
+                alerts = json.load(f)
+        rates = minute_rates(df)
+        new_alerts = 0
+        for server, server_rates in rates.groupby(level="Server", sort=False):
+            server_state = state.setdefault(server, {"last_minute": None, "metrics": {m: new_detector_state() for m in ANOMALY_METRICS}})
+            last_minute = pd.Timestamp(server_state["last_minute"]) if server_state["last_minute"] else None
+            # Ostatnia minuta może być jeszcze niepełna - zostaje na następne uruchomienie
+            server_rates = server_rates.droplevel("Server").iloc[:-1]
+            if last_minute is not None:
+                server_rates = server_rates[server_rates.index > last_minute]
+            if server_rates.empty:
+                continue
+            # Puste minuty (do ANOMALY_MAX_GAP) liczą się jako zera; dłuższa przerwa to restart serwera
+            full_index = []
+            prev = last_minute
+            for minute in server_rates.index:
+                if prev is not None and minute - prev <= pd.Timedelta(minutes=ANOMALY_MAX_GAP):
+                    full_index.extend(pd.date_range(prev + pd.Timedelta(minutes=1), minute - pd.Timedelta(minutes=1), freq="min"))
+                full_index.append(minute)
+                prev = minute
+            server_rates = server_rates.reindex(full_index, fill_value=0)
+            result["buckets"] += len(server_rates)
+
+            for metric in ANOMALY_METRICS:
+                detector = server_state["metrics"][metric]
+                for minute, value in zip(server_rates.index, server_rates[metric].tolist()):
+                    z, baseline = update_detector(detector, minute.hour, value)
+                    if z >= ANOMALY_Z_WARNING and value >= ANOMALY_MIN_COUNT:
+                        alerts.append({
+                            "Server": server,
+                            "Metric": metric,
+                            "Minute": minute.strftime("%Y-%m-%d %H:%M"),
+                            "Value": int(value),
+                            "Baseline": round(baseline, 2),
+                            "ZScore": round(z, 2),
+                            "Severity": "critical" if z >= ANOMALY_Z_CRITICAL else "warning",
+                        })
+                        new_alerts += 1
+            server_state["last_minute"] = server_rates.index[-1].isoformat()
+
+        alerts.sort(key=lambda a: (a["Minute"], a["Server"], a["Metric"]))
+        with open(ANOMALY_STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        with open(ANOMALY_ALERTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(alerts, f, ensure_ascii=False, indent=1)
+        result["alerts"] = alerts
+        result["new_alerts"] = new_alerts
+        logging.info(f"🚨 Anomalie: {new_alerts} nowych alertów ({result['buckets']} minut przetworzonych, {len(alerts)} alertów łącznie).")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w detect_anomalies: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w detect_anomalies: {e}")
+        return result
+
+# Korelacja ostrzeżeń sieciowych z rozłączeniami graczy: dla każdego rozłączenia liczymy ostrzeżenia
+# z poprzedzających CORRELATION_WINDOW sekund (okno na posortowanych czasach, bez porównań parami)
+CORRELATION_WINDOW = 60
+
+def timestamps_ns(values):
+    return values.to_numpy().astype("datetime64[ns]").astype("int64")
+
+def network_window_coverage(warning_ns, window_ns, span_ns):
+    # Ułamek czasu obserwacji, w którym "ostatnie N sekund" zawiera jakieś ostrzeżenie (linia bazowa)
+    if span_ns <= 0 or len(warning_ns) == 0:
+        return 0.0
+    gaps = np.minimum(np.diff(warning_ns), window_ns)
+    return min(1.0, float(gaps.sum() + window_ns) / span_ns)
+
+def correlate_network_disconnects(df):
+    result = {"window": CORRELATION_WINDOW, "disconnects": [], "players": [], "hours": [], "summary": {}}
+    try:
+        if df is None or df.empty:
+            return result
+        window_ns = CORRELATION_WINDOW * 1_000_000_000
+        timed = df.dropna(subset=["Timestamp"])
+        rows, coverage, observed = [], 0.0, 0
+        for server, df_srv in timed.groupby("Server", sort=True):
+            net = df_srv[df_srv["EventType"].isin(NETWORK_EVENT_TYPES)].sort_values("Timestamp")
+            disc = df_srv[df_srv["EventType"] == "player_disconnected"].sort_values("Timestamp")
+            if disc.empty:
+                continue
+            disc_ns = timestamps_ns(disc["Timestamp"])
+            frame = pd.DataFrame({
+                "Timestamp": disc["Timestamp"].to_numpy(),
+                "Player": [d.get("PlayerName", "Unknown") for d in disc["Details"]],
+                "Reason": [d.get("Reason", "") for d in disc["Details"]],
+            })
+            # Liczba ostrzeżeń danego typu w oknie (t - N, t]: dwa wyszukiwania binarne na typ
+            total = np.zeros(len(disc_ns), dtype=np.int64)
+            for etype in NETWORK_EVENT_TYPES:
+                times = timestamps_ns(net.loc[net["EventType"] == etype, "Timestamp"])
+                counts = np.searchsorted(times, disc_ns, side="right") - np.searchsorted(times, disc_ns - window_ns, side="right")
+                frame[etype] = counts
+                total += counts
+            frame["Warnings"] = total
+            # Najbliższe wcześniejsze ostrzeżenie (as-of join) - odstęp w sekundach i jego typ
+            if not net.empty:
+                last = pd.merge_asof(
+                    frame[["Timestamp"]],
+                    net[["Timestamp", "EventType"]].rename(columns={"Timestamp": "WarningTime"}),
+                    left_on="Timestamp", right_on="WarningTime", direction="backward",
+                )
+                frame["LastWarning"] = last["EventType"].fillna("").to_numpy()
+                frame["SecondsSinceWarning"] = ((last["Timestamp"] - last["WarningTime"]).dt.total_seconds()).round(3).to_numpy()
+            else:
+                frame["LastWarning"] = ""
+                frame["SecondsSinceWarning"] = np.nan
+            frame["Server"] = server
+            rows.append(frame)
+            span = int((df_srv["Timestamp"].max() - df_srv["Timestamp"].min()).value)
+            coverage += network_window_coverage(timestamps_ns(net["Timestamp"]), window_ns, span) * span
+            observed += span
+
+        if not rows:
+            logging.info("⚠️ Brak rozłączeń graczy do korelacji z ostrzeżeniami sieciowymi.")
+            return result
+        frame = pd.concat(rows, ignore_index=True)
+        frame["Correlated"] = frame["Warnings"] > 0
+        frame["Hour"] = frame["Timestamp"].dt.hour
+
+        players = frame.groupby("Player").agg(
+            Disconnects=("Correlated", "size"),
+            Lost=("Reason", lambda r: int((r == "lost").sum())),
+            Correlated=("Correlated", "sum"),
+            Warnings=("Warnings", "sum"),
+        ).reset_index()
+        players["Rate"] = (players["Correlated"] / players["Disconnects"]).round(3)
+        players = players.sort_values(["Correlated", "Disconnects"], ascending=False)
+
+        hours = frame.groupby("Hour").agg(Disconnects=("Correlated", "size"), Correlated=("Correlated", "sum")).reindex(range(24), fill_value=0).reset_index()
+        hours["Rate"] = (hours["Correlated"] / hours["Disconnects"].where(hours["Disconnects"] > 0)).fillna(0).round(3)
+
+        correlated = int(frame["Correlated"].sum())
+        lost = frame[frame["Reason"] == "lost"]
+        left = frame[frame["Reason"] == "left"]
+        baseline = round(coverage / observed, 4) if observed else 0.0
+        rate = round(correlated / len(frame), 4)
+        result["summary"] = {
+            "Disconnects": len(frame),
+            "Correlated": correlated,
+            "Rate": rate,
+            "LostRate": round(float(lost["Correlated"].mean()), 4) if not lost.empty else 0.0,
+            "LeftRate": round(float(left["Correlated"].mean()), 4) if not left.empty else 0.0,
+            "Baseline": baseline,
+            "Lift": round(rate / baseline, 2) if baseline else None,
+        }
+        frame["Timestamp"] = frame["Timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        frame["SecondsSinceWarning"] = frame["SecondsSinceWarning"].astype(object).where(frame["SecondsSinceWarning"].notna(), None)
+        result["disconnects"] = frame.drop(columns=["Hour"]).to_dict("records")
+        result["players"] = players.to_dict("records")
+        result["hours"] = hours.to_dict("records")
+        with open(NETWORK_CORRELATION_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1, default=int)
+        logging.info(f"📡 Korelacja sieć/rozłączenia ({CORRELATION_WINDOW}s): {correlated}/{len(frame)} rozłączeń poprzedzonych ostrzeżeniem ({rate:.1%}, linia bazowa {baseline:.1%}).")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w correlate_network_disconnects: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w correlate_network_disconnects: {e}")
+        return result
+
+# Etap "table" potoku: tabela zdarzeń (df) dla pozostałych etapów; pliki zapisuje etap "export" (export_partitions)
+def export_data(events, sessions_df=None):
     try:
-        df = pd.DataFrame(events)
+        df = events_frame(events)
         df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
         return df
     except Exception as e:
@@ -494,7 +2188,372 @@ def export_data(events, sessions_df):
         logging.error(f"❌ Błąd w export_data: {e}")
         return pd.DataFrame()
 
-# Eksport modów z problemami (tylko do pamięci, bez zapisu do plików)
+# Eksport strumieniowy: zdarzenia i sesje do plików Parquet podzielonych na dni oraz do Excela
+# (openpyxl w trybie write-only), zapisywane porcjami; przepisywane są tylko zmienione dni
+EXPORT_EVENT_COLUMNS = ["Timestamp", "LastTimestamp", "Count", "Server", "File", "Offset", "EventType", "LineType", "Inferred", "Details"]
+EXPORT_SESSION_COLUMNS = ["Server", "Player", "Start", "End", "Duration"]
+EXPORT_CHUNK_ROWS = 50000
+# Jawne schematy Parquet: typ kolumny nie zależy od pierwszej porcji (kolumna pusta w pierwszych
+# 50 tys. wierszach, np. LastTimestamp albo End sesji, byłaby typu null i kolejna porcja by się nie rzutowała)
+if pa is not None:
+    EXPORT_EVENT_SCHEMA = pa.schema([
+        ("Timestamp", pa.timestamp("us")), ("LastTimestamp", pa.timestamp("us")), ("Count", pa.int64()),
+        ("Server", pa.string()), ("File", pa.string()), ("Offset", pa.int64()), ("EventType", pa.string()),
+        ("LineType", pa.string()), ("Inferred", pa.bool_()), ("Details", pa.string()),
+    ])
+    EXPORT_SESSION_SCHEMA = pa.schema([
+        ("Server", pa.string()), ("Player", pa.string()), ("Start", pa.timestamp("us")), ("End", pa.timestamp("us")),
+        ("Duration", pa.float64()),
+    ])
+    EXPORT_ROLLUP_SCHEMA = pa.schema([("Server", pa.string()), ("Hour", pa.timestamp("us")), ("EventType", pa.string()), ("Count", pa.int64())])
+    EXPORT_MOD_ISSUES_SCHEMA = pa.schema([("Mod", pa.string()), ("Count", pa.int64())])
+else:
+    EXPORT_EVENT_SCHEMA = EXPORT_SESSION_SCHEMA = EXPORT_ROLLUP_SCHEMA = EXPORT_MOD_ISSUES_SCHEMA = None
+
+def export_event_rows(day_events):
+    for e in day_events:
+        yield [e.Timestamp, e.LastTimestamp, e.Count, e.Server, e.File, e.Offset, e.EventType, e.LineType, e.Inferred,
+               json.dumps(e.Details, ensure_ascii=False, default=str)]
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_parquet(path, schema, rows):
+    if pq is None:
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    writer = None
+    try:
+        for chunk in chunked(rows, EXPORT_CHUNK_ROWS):
+            table = pa.Table.from_pydict({col: [row[i] for row in chunk] for i, col in enumerate(schema.names)}, schema=schema)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+    except Exception:
+        if writer is not None:
+            writer.close()
+        # Niedokończony plik tymczasowy nie może zostać obok partycji
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if writer is None:
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+def export_value(value):
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    if value is None or (isinstance(value, float) and value != value) or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+def write_excel(path, sheets):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    wb = Workbook(write_only=True)
+    for title, columns, rows in sheets:
+        ws = wb.create_sheet(title)
+        ws.append(columns)
+        for row in rows:
+            ws.append([export_value(v) for v in row])
+    tmp_path = path + ".tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, path)
+
+# Skrót partycji liczony z rekordów dnia (pozycja i długość linii w pliku wyznaczają Details),
+# a nie z rozmiarów plików - dopisanie linii do bieżącego logu nie unieważnia poprzednich dni
+def export_partition_digest(day, day_events, day_sessions):
+    digest = hashlib.sha1(f"{day}|{EXPORT_VERSION}".encode("utf-8"))
+    for e in day_events:
+        digest.update(f"{e.Server}|{e.File}|{e.Offset}|{e.Length}|{e.Count}|{e.Timestamp}|{e.LastTimestamp}|{e.EventType}|{e.LineType}|{e.Inferred}\n".encode("utf-8"))
+    digest.update(json.dumps(day_sessions, ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def export_partitions(events, sessions_df, mod_issues, df):
+    try:
+        if pq is None:
+            logging.warning("⚠️ Brak pakietu pyarrow - eksport Parquet pominięty, zapisuję tylko Excel.")
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        manifest = {}
+        if os.path.exists(EXPORT_MANIFEST):
+            try:
+                with open(EXPORT_MANIFEST, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (ValueError, OSError) as e:
+                logging.warning(f"⚠️ Nie można wczytać {EXPORT_MANIFEST}: {e}")
+
+        by_day = {}
+        for e in events:
+            if e.Timestamp is not None:
+                by_day.setdefault(e.Timestamp.date(), []).append(e)
+        sessions_by_day = {}
+        if not sessions_df.empty:
+            for row in sessions_df[EXPORT_SESSION_COLUMNS].itertuples(index=False):
+                start = pd.Timestamp(row.Start) if row.Start is not None else pd.NaT
+                if not pd.isna(start):
+                    sessions_by_day.setdefault(start.date(), []).append([export_value(v) for v in row])
+
+        written = skipped = 0
+        for day in sorted(by_day):
+            day_events = by_day[day]
+            day_sessions = sessions_by_day.get(day, [])
+            digest = export_partition_digest(day, day_events, day_sessions)
+            excel_path = os.path.join(EXPORT_DIR, "excel", f"{day}.xlsx")
+            if manifest.get(str(day)) == digest and os.path.exists(excel_path):
+                skipped += 1
+                continue
+            write_parquet(os.path.join(EXPORT_DIR, "events", f"day={day}", "events.parquet"), EXPORT_EVENT_SCHEMA, export_event_rows(day_events))
+            if day_sessions:
+                write_parquet(os.path.join(EXPORT_DIR, "sessions", f"day={day}", "sessions.parquet"), EXPORT_SESSION_SCHEMA, day_sessions)
+            write_excel(excel_path, [
+                ("Events", EXPORT_EVENT_COLUMNS, export_event_rows(day_events)),
+                ("Sessions", EXPORT_SESSION_COLUMNS, day_sessions),
+            ])
+            manifest[str(day)] = digest
+            written += 1
+
+        # Małe zestawienia (agregaty godzinowe, problemy z modami) zapisywane przy każdym uruchomieniu
+        rollup_rows = []
+        if df is not None and not df.empty:
+            timed = df.dropna(subset=["Timestamp"])
+            rollup = weighted_size(timed, ["Server", timed["Timestamp"].dt.floor("h"), "EventType"])
+            rollup_rows = [[server, hour.to_pydatetime(), etype, int(count)] for (server, hour, etype), count in rollup.items()]
+        mod_rows = [[mod, int(count)] for mod, count in (mod_issues or {}).items()]
+        write_parquet(os.path.join(EXPORT_DIR, "rollups", "hourly.parquet"), EXPORT_ROLLUP_SCHEMA, rollup_rows)
+        write_parquet(os.path.join(EXPORT_DIR, "mod_issues.parquet"), EXPORT_MOD_ISSUES_SCHEMA, mod_rows)
+        write_excel(os.path.join(EXPORT_DIR, "excel", "summary.xlsx"), [
+            ("HourlyRollup", ["Server", "Hour", "EventType", "Count"], rollup_rows),
+            ("ModIssues", ["Mod", "Count"], mod_rows),
+        ])
+
+        with open(EXPORT_MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        logging.info(f"📤 Eksport: {written} dni zapisanych, {skipped} bez zmian ({EXPORT_DIR}).")
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w export_partitions: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w export_partitions: {e}")
+
+# Retencja warstwowa: surowe logi (i strony dzienne / eksport) tylko z ostatnich RETENTION_RAW_DAYS dni,
+# agregaty godzinowe i najczęstsze szablony problemów przez RETENTION_HOURLY_MONTHS miesięcy, agregaty
+# dzienne na zawsze. Pliki starsze niż okno surowe są zwijane do logs/retention.json i usuwane z
+# log_cache; download_logs nie pobiera ich ponownie. Okna liczone od najnowszego zdarzenia serwera.
+RETENTION_RAW_DAYS = int(os.environ.get("RETENTION_RAW_DAYS", "30"))
+RETENTION_HOURLY_MONTHS = int(os.environ.get("RETENTION_HOURLY_MONTHS", "12"))
+RETENTION_TOP_TEMPLATES = 50
+
+def load_retention_store():
+    store = {"compacted": {}, "hourly": {}, "daily": {}, "templates": {}}
+    if os.path.exists(RETENTION_FILE):
+        try:
+            with open(RETENTION_FILE, "r", encoding="utf-8") as f:
+                store.update(json.load(f))
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️ Nie można wczytać {RETENTION_FILE}: {e}")
+    return store
+
+def new_rollup():
+    return {"Events": 0, "Errors": 0, "Warnings": 0, "Saves": 0}
+
+def rollup_event(bucket, event):
+    bucket["Events"] += event.Count
+    if event.LineType == "ERROR":
+        bucket["Errors"] += event.Count
+    elif event.LineType == "WARNING":
+        bucket["Warnings"] += event.Count
+    if event.EventType == "save_game" and event.Details.get("Phase") != "start":
+        bucket["Saves"] += event.Count
+
+def compact_retention(events):
+    try:
+        store = load_retention_store()
+        by_file, reference = {}, {}
+        for e in events:
+            if e.Timestamp is None:
+                continue
+            by_file.setdefault((e.Server, e.File), []).append(e)
+            last = e.LastTimestamp or e.Timestamp
+            if e.Server not in reference or last > reference[e.Server]:
+                reference[e.Server] = last
+
+        compacted_files, raw_days, expired = 0, set(), set()
+        for (server, fname), file_events in sorted(by_file.items()):
+            last = max(e.LastTimestamp or e.Timestamp for e in file_events)
+            if last >= reference[server] - timedelta(days=RETENTION_RAW_DAYS):
+                raw_days.update(e.Timestamp.date() for e in file_events)
+                continue
+            expired.add((server, fname))
+            # Plik już zwinięty, którego nie udało się wcześniej usunąć - agregaty są w archiwum
+            if fname in store["compacted"].get(server, {}):
+                continue
+            hourly = store["hourly"].setdefault(server, {})
+            daily = store["daily"].setdefault(server, {})
+            templates = store["templates"].setdefault(server, {})
+            for e in file_events:
+                hour = e.Timestamp.strftime("%Y-%m-%d %H:00")
+                rollup_event(hourly.setdefault(hour, new_rollup()), e)
+                day = daily.setdefault(hour[:10], {**new_rollup(), "LineTypes": {}})
+                rollup_event(day, e)
+                day["LineTypes"][e.LineType] = day["LineTypes"].get(e.LineType, 0) + e.Count
+                if e.LineType in ("ERROR", "WARNING"):
+                    message = e.Details.get("Message") or e.Details.get("Entry") or e.EventType
+                    month = templates.setdefault(hour[:7], {})
+                    key = f"{e.LineType}: {rle_template(str(message))[:200]}"
+                    month[key] = month.get(key, 0) + e.Count
+            path = os.path.join(namespace_dir(server), fname)
+            store["compacted"].setdefault(server, {})[fname] = os.path.getsize(path) if os.path.exists(path) else 0
+            compacted_files += 1
+
+        # Warstwa godzinowa i szablony wygasają po RETENTION_HOURLY_MONTHS - zostają agregaty dzienne
+        for server, last in reference.items():
+            hourly_cutoff = (last - timedelta(days=RETENTION_HOURLY_MONTHS * 30)).strftime("%Y-%m-%d %H:00")
+            hourly = store["hourly"].get(server, {})
+            for hour in [h for h in hourly if h < hourly_cutoff]:
+                del hourly[hour]
+            templates = store["templates"].get(server, {})
+            for month in list(templates):
+                if month < hourly_cutoff[:7]:
+                    del templates[month]
+                else:
+                    templates[month] = dict(Counter(templates[month]).most_common(RETENTION_TOP_TEMPLATES))
+
+        tmp_path = RETENTION_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(store, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, RETENTION_FILE)
+
+        # Surowe pliki są usuwane dopiero po zapisaniu archiwum i tylko te, które w nim są
+        for server, fname in sorted(expired):
+            path = os.path.join(namespace_dir(server), fname)
+            if fname in store["compacted"].get(server, {}) and os.path.exists(path):
+                os.remove(path)
+
+        # Strony dzienne i partycje eksportu dni, które nie mają już surowych logów
+        archived_days = {day for daily in store["daily"].values() for day in daily} - {str(d) for d in raw_days}
+        pruned = prune_day_outputs(archived_days)
+        if compacted_files or pruned:
+            logging.info(f"🗄️ Retencja: zwinięto {compacted_files} plików logów, usunięto {pruned} stron/partycji archiwalnych dni.")
+        # Zdarzenia zwiniętych plików są już w archiwum - dalsza analiza dotyczy tylko okna surowego
+        return [e for e in events if (e.Server, e.File) not in expired] if expired else events
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w compact_retention: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w compact_retention: {e}")
+        return events
+
+def prune_day_outputs(days):
+    removed = 0
+    for manifest_path, paths in (
+        (DAY_PAGES_MANIFEST, lambda day: [os.path.join(DAY_PAGES_DIR, f"{day}.html")]),
+        (EXPORT_MANIFEST, lambda day: [
+            os.path.join(EXPORT_DIR, "events", f"day={day}", "events.parquet"),
+            os.path.join(EXPORT_DIR, "sessions", f"day={day}", "sessions.parquet"),
+            os.path.join(EXPORT_DIR, "excel", f"{day}.xlsx"),
+        ]),
+    ):
+        if not os.path.exists(manifest_path):
+            continue
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        for day in sorted(days & set(manifest)):
+            for path in paths(day):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+                    parent = os.path.dirname(path)
+                    if os.path.basename(parent).startswith("day=") and not os.listdir(parent):
+                        os.rmdir(parent)
+            del manifest[day]
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+    return removed
+
+# Dołączenie archiwum retencji do wykresów i sum raportu (archiwum zawiera tylko pliki już usunięte
+# z log_cache, więc nie dubluje zdarzeń z bieżącej analizy)
+def add_chart_counts(chart, labels, values):
+    counts = Counter(dict(zip(chart.get("labels", []), chart.get("data", []))))
+    for label, value in zip(labels, values):
+        counts[label] += value
+    chart["labels"] = sorted(counts)
+    chart["data"] = [counts[label] for label in chart["labels"]]
+    return chart
+
+def merge_retention_history(history, other_charts, save_charts, warning_charts):
+    if not history:
+        return
+    targets = [
+        (other_charts, "events_per_hour", "events_per_hour_", "Events"),
+        (save_charts, "saves_all", "saves_", "Saves"),
+        (warning_charts, "warnings_per_hour", "warnings_per_hour_", "Warnings"),
+    ]
+    for server, hourly in history.get("hourly", {}).items():
+        for charts, aggregate, day_prefix, field in targets:
+            hours = sorted(h for h, row in hourly.items() if row[field])
+            add_chart_counts(charts.setdefault(aggregate, {"labels": [], "data": []}), hours, [hourly[h][field] for h in hours])
+            for hour in hours:
+                add_chart_counts(charts.setdefault(f"{day_prefix}{hour[:10]}", {"labels": [], "data": []}), [hour[11:]], [hourly[hour][field]])
+    # Dni bez warstwy godzinowej: suma dnia w osobnej serii dziennej (bound_chart_history dolicza ją
+    # do serii tygodniowej/miesięcznej), a nie jako sztuczna etykieta na wykresie godzinowym dnia
+    for server, daily in history.get("daily", {}).items():
+        hourly_days = {h[:10] for h in history.get("hourly", {}).get(server, {})}
+        for day, row in daily.items():
+            if day in hourly_days:
+                continue
+            for charts, aggregate, day_prefix, field in targets:
+                if row[field]:
+                    add_chart_counts(charts.setdefault(f"{day_prefix}daily", {"labels": [], "data": []}), [day], [row[field]])
+    line_types = Counter()
+    for daily in history.get("daily", {}).values():
+        for row in daily.values():
+            line_types.update(row.get("LineTypes", {}))
+    if line_types:
+        chart = add_chart_counts(other_charts.setdefault("event_types", {"labels": [], "data": []}), list(line_types), list(line_types.values()))
+        order = sorted(range(len(chart["labels"])), key=lambda i: -chart["data"][i])
+        chart["labels"], chart["data"] = [chart["labels"][i] for i in order], [chart["data"][i] for i in order]
+
+def history_totals(history):
+    totals = {"servers": {}, "days": {}, "all": new_rollup(), "first": {}}
+    for server, daily in (history or {}).get("daily", {}).items():
+        if daily:
+            totals["first"][server] = min(daily)
+        for day, row in daily.items():
+            for bucket in (totals["servers"].setdefault(server, new_rollup()), totals["days"].setdefault(day, new_rollup()), totals["all"]):
+                for field in bucket:
+                    bucket[field] += row[field]
+    return totals
+
+def merge_history_rows(server_summary, day_pages, totals, anomalies=None):
+    for server, row in totals["servers"].items():
+        summary = next((r for r in server_summary if r["Server"] == server), None)
+        if summary is None:
+            summary = {"Server": server, "Events": 0, "Errors": 0, "Warnings": 0, "ErrorsPer1k": 0, "Mods": 0, "Players": 0, "Sessions": 0, "PlayMinutes": 0.0, "First": "", "Last": ""}
+            server_summary.append(summary)
+        for field in ("Events", "Errors", "Warnings"):
+            summary[field] += row[field]
+        summary["ErrorsPer1k"] = round(summary["Errors"] * 1000 / summary["Events"], 2) if summary["Events"] else 0
+        summary["First"] = min(filter(None, [summary["First"], totals["first"].get(server)]))
+    alerts = Counter(a["Minute"][:10] for a in (anomalies or {}).get("alerts", []))
+    pages = {row["Day"]: row for row in day_pages}
+    for day, row in totals["days"].items():
+        page = pages.setdefault(day, {"Day": day, "Events": 0, "Errors": 0, "Warnings": 0, "Alerts": alerts.get(day, 0), "Page": None})
+        for field in ("Events", "Errors", "Warnings"):
+            page[field] += row[field]
+    server_summary.sort(key=lambda r: r["Server"])
+    return server_summary, [pages[day] for day in sorted(pages)]
+
+# Etap "mod_charts" potoku: dane wykresu modów z problemami dla raportu HTML
 def export_mod_issues(df, mod_issues):
     charts = {}
     try:
@@ -513,9 +2572,430 @@ def export_mod_issues(df, mod_issues):
         logging.error(f"❌ Błąd w export_mod_issues: {e}")
     return charts
 
-# Generowanie wykresów
-def generate_charts(df, sessions_df, admin_cmds):
-    charts = {}
+# Indeks manifestów modów: jeden manifest na uruchomienie serwera (plik logu),
+# przechowywany raz pod swoim hashem, plus różnice między kolejnymi uruchomieniami
+def boot_time_from_filename(fname):
+    match = BOOT_FILE_RE.search(fname or "")
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%Y-%m-%d_%H-%M-%S")
+    except ValueError:
+        return None
+
+def manifest_hash(entries):
+    payload = json.dumps(entries, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def load_manifest_store():
+    if os.path.exists(MOD_MANIFEST_FILE):
+        try:
+            with open(MOD_MANIFEST_FILE, "r", encoding="utf-8") as f:
+                store = json.load(f)
+            store.setdefault("manifests", {})
+            store.setdefault("boots", {})
+            return store
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️ Nie można wczytać {MOD_MANIFEST_FILE}: {e}")
+    return {"manifests": {}, "boots": {}}
+
+def diff_manifests(old_entries, new_entries):
+    old = {e[0]: e for e in old_entries}
+    new = {e[0]: e for e in new_entries}
+    added = [{"Name": n, "Kind": new[n][3], "Version": new[n][1]} for n in sorted(new.keys() - old.keys())]
+    removed = [{"Name": n, "Kind": old[n][3], "Version": old[n][1]} for n in sorted(old.keys() - new.keys())]
+    changed = [
+        {"Name": n, "Kind": new[n][3], "OldVersion": old[n][1], "NewVersion": new[n][1],
+         "HashChanged": old[n][2] != new[n][2]}
+        for n in sorted(old.keys() & new.keys())
+        if old[n][1] != new[n][1] or old[n][2] != new[n][2]
+    ]
+    return added, removed, changed
+
+def build_mod_manifest_index(df):
+    result = {"mods": [], "changes": [], "boots": 0, "manifests": 0}
+    try:
+        if df is None or df.empty or "File" not in df.columns:
+            return result
+        store = load_manifest_store()
+        loads = df[df["EventType"].isin(["mod_load", "dlc_load"])]
+
+        # Statystyki błędów/ostrzeżeń dla każdego uruchomienia
+        line_types = weighted_size(df, ["Server", "File", "LineType"]).unstack(fill_value=0)
+        boot_sizes = weighted_size(df, ["Server", "File"])
+
+        for (server, fname), group in loads.groupby(["Server", "File"], sort=False):
+            entries = set()
+            for details, etype in zip(group["Details"], group["EventType"]):
+                d = parse_details(details)
+                if d.get("Name"):
+                    entries.add((MOD_REVISION_RE.sub("", d["Name"]), d.get("Version", ""), d.get("Hash", ""), "dlc" if etype == "dlc_load" else "mod"))
+            entries = [list(e) for e in sorted(entries)]
+            digest = manifest_hash(entries)
+            store["manifests"].setdefault(digest, entries)
+            boot_time = boot_time_from_filename(fname)
+            counts = line_types.loc[(server, fname)] if (server, fname) in line_types.index else {}
+            store["boots"][f"{server}/{fname}"] = {
+                "Server": server,
+                "File": fname,
+                "BootTime": boot_time.strftime("%Y-%m-%d %H:%M:%S") if boot_time else fname,
+                "Manifest": digest,
+                "Events": int(boot_sizes.get((server, fname), 0)),
+                "Errors": int(counts.get("ERROR", 0)),
+                "Warnings": int(counts.get("WARNING", 0)),
+            }
+
+        # Usuń manifesty, do których nie odwołuje się już żadne uruchomienie
+        used = {b["Manifest"] for b in store["boots"].values()}
+        store["manifests"] = {k: v for k, v in store["manifests"].items() if k in used}
+        with open(MOD_MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(store, f, ensure_ascii=False, indent=1)
+
+        # Jedna pozycja na unikalną wersję moda
+        mods = {}
+        boots_by_server = {}
+        for boot in sorted(store["boots"].values(), key=lambda b: (b["Server"], b["BootTime"])):
+            boots_by_server.setdefault(boot["Server"], []).append(boot)
+            for name, version, mod_hash, kind in store["manifests"][boot["Manifest"]]:
+                row = mods.setdefault((name, version, mod_hash), {
+                    "Name": name, "Kind": kind, "Version": version, "Hash": mod_hash,
+                    "Boots": 0, "FirstSeen": boot["BootTime"], "LastSeen": boot["BootTime"],
+                })
+                row["Boots"] += 1
+                row["FirstSeen"] = min(row["FirstSeen"], boot["BootTime"])
+                row["LastSeen"] = max(row["LastSeen"], boot["BootTime"])
+        result["mods"] = sorted(mods.values(), key=lambda r: (r["Kind"], r["Name"].lower(), r["FirstSeen"]))
+
+        # Różnice między kolejnymi uruchomieniami tego samego serwera
+        for server, boots in boots_by_server.items():
+            for prev, cur in zip(boots, boots[1:]):
+                if prev["Manifest"] == cur["Manifest"]:
+                    continue
+                added, removed, changed = diff_manifests(store["manifests"][prev["Manifest"]], store["manifests"][cur["Manifest"]])
+                result["changes"].append({
+                    "Server": server,
+                    "BootTime": cur["BootTime"],
+                    "PrevBootTime": prev["BootTime"],
+                    "Added": added,
+                    "Removed": removed,
+                    "Changed": changed,
+                    "ErrorsBefore": prev["Errors"],
+                    "ErrorsAfter": cur["Errors"],
+                    "WarningsBefore": prev["Warnings"],
+                    "WarningsAfter": cur["Warnings"],
+                    "ErrorRateBefore": round(prev["Errors"] * 1000 / prev["Events"], 2) if prev["Events"] else 0,
+                    "ErrorRateAfter": round(cur["Errors"] * 1000 / cur["Events"], 2) if cur["Events"] else 0,
+                })
+        result["boots"] = len(store["boots"])
+        result["manifests"] = len(store["manifests"])
+        logging.info(f"📦 Manifesty modów: {result['manifests']} unikalnych na {result['boots']} uruchomień, {len(result['mods'])} wersji modów, {len(result['changes'])} zmian.")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w build_mod_manifest_index: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w build_mod_manifest_index: {e}")
+        return result
+
+# Profil wydajności uruchomień (logs/boot_profiles.json): sprzęt i ustawienia z nagłówka pliku logu
+# (sekcje "Main System", "Physics System", "Hardware Profile" itd.) plus metryki wyliczone z tabeli
+# zdarzeń. Konfiguracje są deduplikowane po skrócie jak manifesty modów, a uruchomienia usunięte
+# przez retencję zostają w magazynie, więc porównanie obejmuje całą historię serwera
+BOOT_HEADER_BYTES = 16384
+BOOT_READY_GAP_SECONDS = 60
+BOOT_HEADER_FIELDS = {
+    ("Main System", "CPU"): "CPU",
+    ("Main System", "Virtual Cores"): "Cores",
+    ("Main System", "Memory"): "Memory",
+    ("Main System", "OS"): "OS",
+    ("Physics System", "Version"): "Physics",
+    ("Physics System", "Thread(s)"): "PhysicsThreads",
+    ("Hardware Profile", "Level"): "Level",
+    ("Hardware Profile", "View Distance Factor"): "ViewDistance",
+    ("Hardware Profile", "LOD Distance Factor"): "LODDistance",
+    ("Hardware Profile", "Shadow Quality"): "ShadowQuality",
+    ("Hardware Profile", "Shader Quality"): "ShaderQuality",
+    ("Hardware Profile", "Terrain Quality"): "TerrainQuality",
+    ("Hardware Profile", "Texture Streaming Memory Budget"): "TextureBudget",
+    ("Farming Simulator 25 (Server)", "Version"): "Game",
+}
+ENGINE_RE = re.compile(r"GIANTS Engine Runtime (\S+ \(\d+\))")
+RENDER_THREADS_RE = re.compile(r"Started (\d+) threads for threadpool 'GIANTS Render threadpool'")
+
+def header_value(value):
+    # "0.750000" i "0.75" to to samo ustawienie
+    if "." not in value:
+        return value
+    try:
+        return f"{float(value):g}"
+    except ValueError:
+        return value
+
+def read_boot_header(path):
+    with open(path, "rb") as f:
+        data = f.read(BOOT_HEADER_BYTES)
+    fields = {}
+    section = None
+    for raw in data.split(b"\n")[:-1]:
+        if TIMESTAMP_B.match(raw):
+            break
+        line = raw.decode("utf-8", errors="replace").rstrip()
+        if not line:
+            continue
+        match = ENGINE_RE.match(line)
+        if match:
+            fields.setdefault("Engine", match.group(1))
+            continue
+        match = RENDER_THREADS_RE.match(line)
+        if match:
+            fields.setdefault("RenderThreads", match.group(1))
+            continue
+        if not line[0].isspace():
+            section = line.strip() if ":" not in line else None
+            continue
+        key, sep, value = line.strip().partition(":")
+        field = BOOT_HEADER_FIELDS.get((section, key))
+        if sep and field:
+            fields.setdefault(field, header_value(value.strip()))
+    return fields
+
+def load_boot_profile_store():
+    if os.path.exists(BOOT_PROFILES_FILE):
+        try:
+            with open(BOOT_PROFILES_FILE, "r", encoding="utf-8") as f:
+                store = json.load(f)
+            store.setdefault("profiles", {})
+            store.setdefault("boots", {})
+            return store
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️ Nie można wczytać {BOOT_PROFILES_FILE}: {e}")
+    return {"profiles": {}, "boots": {}}
+
+def startup_load_burst(loads):
+    # Początkowa seria wczytywania zasobów kończy się na pierwszej przerwie dłuższej niż BOOT_READY_GAP_SECONDS
+    times = loads["Timestamp"].tolist()
+    end = len(times)
+    for i in range(1, len(times)):
+        if (times[i] - times[i - 1]).total_seconds() > BOOT_READY_GAP_SECONDS:
+            end = i
+            break
+    return loads.iloc[:end]
+
+def build_boot_profiles(df, save_ops=None):
+    result = {"boots": [], "profiles": []}
+    try:
+        if df is None or df.empty or "File" not in df.columns:
+            return result
+        store = load_boot_profile_store()
+        save_durations = {}
+        for save in (save_ops or {}).get("saves", []):
+            if save["Duration"] is not None:
+                save_durations.setdefault((save["Server"], save["Boot"]), []).append(save["Duration"])
+
+        timed = df[df["Timestamp"].notna()]
+        for (server, fname), group in timed.groupby(["Server", "File"], sort=False):
+            try:
+                header = read_boot_header(os.path.join(namespace_dir(server), fname))
+            except OSError as e:
+                logging.warning(f"⚠️ Nie można odczytać nagłówka {server}/{fname}: {e}")
+                header = {}
+            profile = manifest_hash(sorted(header.items()))
+            store["profiles"].setdefault(profile, header)
+
+            boot = boot_time_from_filename(fname)
+            boot_label = boot.strftime("%Y-%m-%d %H:%M:%S") if boot else fname
+            start = pd.Timestamp(boot) if boot else group["Timestamp"].min()
+            last = group["Timestamp"].max()
+
+            loads = startup_load_burst(group[group["EventType"] == "file_load"].sort_values("Timestamp", kind="stable"))
+            load_ms = [d.get("LoadTimeMS", 0) for d in loads["Details"]]
+            ready = loads["Timestamp"].iloc[-1] if len(loads) else start
+            memory_kb = [d.get("MemoryKB") for d in group.loc[group["EventType"] == "memory_warning", "Details"] if d.get("MemoryKB")]
+            durations = save_durations.get((server, boot_label), [])
+            # Błędy startowe (mody, brakujące pliki) są prawie stałe na uruchomienie - częstość liczona po gotowości
+            errors = group[group["LineType"] == "ERROR"]
+            runtime_errors = event_weight(errors[errors["Timestamp"] > ready])
+            runtime_hours = max((last - ready).total_seconds(), 0) / 3600
+            store["boots"][f"{server}/{fname}"] = {
+                "Server": server,
+                "File": fname,
+                "BootTime": boot_label,
+                "Profile": profile,
+                "LoadFiles": len(load_ms),
+                "LoadSeconds": round(sum(load_ms) / 1000, 1),
+                "ReadySeconds": round((ready - start).total_seconds(), 1) if len(loads) else None,
+                "SaveAvgSeconds": round(sum(durations) / len(durations), 1) if durations else None,
+                "LuaPeakMB": round(max(memory_kb) / 1024) if memory_kb else None,
+                "UptimeHours": round(max((last - start).total_seconds(), 0) / 3600, 2),
+                "StartupErrors": event_weight(errors) - runtime_errors,
+                "RuntimeErrors": runtime_errors,
+                "RuntimeHours": round(runtime_hours, 2),
+                "ErrorsPerHour": round(runtime_errors / runtime_hours, 1) if runtime_hours else None,
+            }
+
+        used = {b["Profile"] for b in store["boots"].values()}
+        store["profiles"] = {k: v for k, v in store["profiles"].items() if k in used}
+        with open(BOOT_PROFILES_FILE, "w", encoding="utf-8") as f:
+            json.dump(store, f, ensure_ascii=False, indent=1)
+
+        # Zmiany sprzętu/ustawień względem poprzedniego uruchomienia tego samego serwera
+        previous = {}
+        for boot in sorted(store["boots"].values(), key=lambda b: (b["Server"], b["BootTime"])):
+            fields = store["profiles"][boot["Profile"]]
+            prev = previous.get(boot["Server"])
+            changes = []
+            if prev is not None and prev["Profile"] != boot["Profile"]:
+                old = store["profiles"][prev["Profile"]]
+                changes = [f'{key}: {old.get(key, "-")} → {fields.get(key, "-")}' for key in sorted(old.keys() | fields.keys()) if old.get(key) != fields.get(key)]
+            result["boots"].append({**boot, **fields, "Profile": boot["Profile"][:8], "Changes": changes})
+            previous[boot["Server"]] = boot
+
+        # Średnie metryki dla każdej konfiguracji: efekt zmiany maszyny lub profilu sprzętowego
+        def mean(values):
+            values = [v for v in values if v is not None]
+            return round(sum(values) / len(values), 1) if values else None
+
+        for profile, fields in store["profiles"].items():
+            boots = [b for b in store["boots"].values() if b["Profile"] == profile]
+            hours = sum(b["RuntimeHours"] for b in boots)
+            result["profiles"].append({
+                **fields,
+                "Profile": profile[:8],
+                "Boots": len(boots),
+                "FirstSeen": min(b["BootTime"] for b in boots),
+                "LastSeen": max(b["BootTime"] for b in boots),
+                "LoadSeconds": mean(b["LoadSeconds"] for b in boots),
+                "ReadySeconds": mean(b["ReadySeconds"] for b in boots),
+                "SaveAvgSeconds": mean(b["SaveAvgSeconds"] for b in boots),
+                "LuaPeakMB": mean(b["LuaPeakMB"] for b in boots),
+                "StartupErrors": mean(b["StartupErrors"] for b in boots),
+                "ErrorsPerHour": round(sum(b["RuntimeErrors"] for b in boots) / hours, 1) if hours else None,
+            })
+        result["profiles"].sort(key=lambda r: r["FirstSeen"])
+        changed = sum(1 for b in result["boots"] if b["Changes"])
+        logging.info(f"🖥️ Profile uruchomień: {len(result['boots'])} uruchomień, {len(result['profiles'])} konfiguracji, {changed} zmian sprzętu/ustawień.")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w build_boot_profiles: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w build_boot_profiles: {e}")
+        return result
+
+# Budżet pamięci map gęstości (logs/density_budget.json): linie "FTG '<mapa>' max needed CPU instances
+# = X MB / Y MB" dają szczytowe zapotrzebowanie i budżet każdej warstwy (densityMap_fruits, ...).
+# Szczyty są zbierane z już sparsowanych zdarzeń i dopisywane do magazynu per uruchomienie, więc
+# historia przeżywa retencję. Warstwa jest oznaczana, gdy urosła względem poprzedniego uruchomienia
+# serwera o DENSITY_GROWTH_RATIO i DENSITY_GROWTH_MIN_MB albo zbliża się do budżetu
+DENSITY_GROWTH_RATIO = 0.1
+DENSITY_GROWTH_MIN_MB = 0.5
+DENSITY_NEAR_BUDGET = 0.8
+DENSITY_TREND_BOOTS = 8
+
+def density_layer(path):
+    return os.path.splitext(os.path.basename(path.replace("\\", "/")))[0]
+
+def load_density_store():
+    if os.path.exists(DENSITY_BUDGET_FILE):
+        try:
+            with open(DENSITY_BUDGET_FILE, "r", encoding="utf-8") as f:
+                store = json.load(f)
+            store.setdefault("boots", {})
+            return store
+        except (ValueError, OSError) as e:
+            logging.warning(f"⚠️ Nie można wczytać {DENSITY_BUDGET_FILE}: {e}")
+    return {"boots": {}}
+
+def build_density_budget(events, mod_manifest=None):
+    result = {"boots": [], "layers": [], "growth": []}
+    try:
+        store = load_density_store()
+        # Warstwa -> [szczyt MB, budżet MB, liczba pomiarów] dla każdego uruchomienia
+        seen = {}
+        for event in events:
+            if event.EventType != "density_map" or "MaxCPU" not in event.Details:
+                continue
+            key = f"{event.Server}/{event.File}"
+            boot = seen.get(key)
+            if boot is None:
+                boot_time = boot_time_from_filename(event.File)
+                boot = seen[key] = {
+                    "Server": event.Server,
+                    "File": event.File,
+                    "BootTime": boot_time.strftime("%Y-%m-%d %H:%M:%S") if boot_time else event.File,
+                    "Layers": {},
+                }
+            layer = boot["Layers"].setdefault(density_layer(event.Details.get("Path", "")), [0.0, 0.0, 0])
+            layer[0] = max(layer[0], event.Details["MaxCPU"])
+            layer[1] = max(layer[1], event.Details["TotalMB"])
+            layer[2] += 1
+        store["boots"].update(seen)
+        with open(DENSITY_BUDGET_FILE, "w", encoding="utf-8") as f:
+            json.dump(store, f, ensure_ascii=False, indent=1)
+
+        mod_changes = {(c["Server"], c["BootTime"]) for c in (mod_manifest or {}).get("changes", [])}
+        history = {}
+        previous = {}
+        for boot in sorted(store["boots"].values(), key=lambda b: (b["Server"], b["BootTime"])):
+            server = boot["Server"]
+            peak = sum(layer[0] for layer in boot["Layers"].values())
+            budget = sum(layer[1] for layer in boot["Layers"].values())
+            result["boots"].append({
+                "Server": server,
+                "BootTime": boot["BootTime"],
+                "Layers": len(boot["Layers"]),
+                "PeakMB": round(peak, 3),
+                "BudgetMB": round(budget, 3),
+                "Usage": round(peak / budget, 4) if budget else None,
+            })
+            prev = previous.get(server)
+            for name, (layer_peak, layer_budget, _) in sorted(boot["Layers"].items()):
+                history.setdefault((server, name), []).append((boot["BootTime"], layer_peak, layer_budget))
+                if prev is None or name not in prev["Layers"]:
+                    continue
+                before = prev["Layers"][name][0]
+                delta = layer_peak - before
+                if delta >= DENSITY_GROWTH_MIN_MB and delta >= before * DENSITY_GROWTH_RATIO:
+                    result["growth"].append({
+                        "Server": server,
+                        "Layer": name,
+                        "BootTime": boot["BootTime"],
+                        "PrevBootTime": prev["BootTime"],
+                        "BeforeMB": round(before, 3),
+                        "AfterMB": round(layer_peak, 3),
+                        "DeltaMB": round(delta, 3),
+                        "Usage": round(layer_peak / layer_budget, 4) if layer_budget else None,
+                        "ModsChanged": (server, boot["BootTime"]) in mod_changes,
+                    })
+            previous[server] = boot
+
+        for (server, name), points in sorted(history.items()):
+            last_time, last_peak, last_budget = points[-1]
+            usage = last_peak / last_budget if last_budget else None
+            result["layers"].append({
+                "Server": server,
+                "Layer": name,
+                "Boots": len(points),
+                "LastBoot": last_time,
+                "PeakMB": round(last_peak, 3),
+                "MaxPeakMB": round(max(p[1] for p in points), 3),
+                "BudgetMB": round(last_budget, 3),
+                "Usage": round(usage, 4) if usage is not None else None,
+                "Trend": [round(p[1], 3) for p in points[-DENSITY_TREND_BOOTS:]],
+                "NearBudget": usage is not None and usage >= DENSITY_NEAR_BUDGET,
+                "Grew": any(g["Server"] == server and g["Layer"] == name for g in result["growth"]),
+            })
+            if usage is not None and usage >= DENSITY_NEAR_BUDGET:
+                logging.warning(f"⚠️ Warstwa {name} ({server}) używa {usage:.0%} budżetu pamięci ({last_peak:.1f} / {last_budget:.1f} MB).")
+        logging.info(f"🗺️ Budżet map gęstości: {len(result['boots'])} uruchomień, {len(result['layers'])} warstw, {len(result['growth'])} wzrostów między uruchomieniami.")
+        return result
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w build_density_budget: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w build_density_budget: {e}")
+        return result
+
+# Generowanie wykresów
+def generate_charts(df, sessions_df, admin_cmds, hours=None):
+    charts = {}
     try:
         if df is None or df.empty:
             logging.info("⚠️ Brak danych do wykresów.")
@@ -524,7 +3004,7 @@ def generate_charts(df, sessions_df, admin_cmds):
             charts["admin_commands"] = {"labels": [], "data": []}
             return charts
 
-        event_counts = df["LineType"].value_counts().reset_index()
+        event_counts = weighted_size(df, "LineType").sort_values(ascending=False).reset_index()
         event_counts.columns = ["LineType", "Count"]
         charts["event_types"] = {
             "labels": event_counts["LineType"].tolist(),
@@ -533,18 +3013,20 @@ def generate_charts(df, sessions_df, admin_cmds):
         logging.info(f"📊 Przygotowano dane event_types: {len(charts['event_types']['labels'])} etykiet, {len(charts['event_types']['data'])} wartości")
 
         if not df["Timestamp"].dropna().empty:
-            event_per_hour = df.groupby(df["Timestamp"].dt.strftime("%Y-%m-%d %H:00"))["EventType"].count().reset_index(name="Count")
+            groups = frame_hours(df, hours)
+            event_per_hour = weighted_size(df, groups["Hour"].rename("Timestamp")).reset_index(name="Count")
             charts["events_per_hour"] = {
                 "labels": event_per_hour["Timestamp"].tolist(),
                 "data": event_per_hour["Count"].tolist()
             }
             logging.info(f"📊 Przygotowano dane events_per_hour: {len(charts['events_per_hour']['labels'])} etykiet, {len(charts['events_per_hour']['data'])} wartości")
 
-            df["Day"] = df["Timestamp"].dt.date
-            for day in df["Day"].unique():
-                df_day = df[df["Day"] == day].copy()
+            # Grupowanie po dniu zamiast filtra df[Day == day] w pętli; df nie jest modyfikowany,
+            # bo w potoku etapów ta sama tabela trafia równolegle do innych etapów
+            for day, day_groups in groups.groupby("Day", sort=False):
+                df_day = df.loc[day_groups.index]
                 if not df_day.empty:
-                    event_per_hour_day = df_day.groupby(df_day["Timestamp"].dt.strftime("%H:00"))["EventType"].count().reset_index(name="Count")
+                    event_per_hour_day = weighted_size(df_day, day_groups["HourOfDay"].rename("Timestamp")).reset_index(name="Count")
                     charts[f"events_per_hour_{day}"] = {
                         "labels": event_per_hour_day["Timestamp"].tolist(),
                         "data": event_per_hour_day["Count"].tolist()
@@ -593,125 +3075,132 @@ def summarize_sessions(sessions_df):
     total_duration = sessions_df.groupby("Player")["Duration"].sum().reset_index().sort_values("Duration", ascending=False)
     return total_duration.to_dict('records')
 
-def generate_html_report(
-    events,
-    event_counts,
-    errors,
-    warnings,
-    warning_types,
-    mod_issues,
-    sessions_df,
-    admin_cmds,
-    save_charts,
-    warning_charts,
-    other_charts
-):
-    try:
-        df = pd.DataFrame(events)
-        report_time = datetime.now(ZoneInfo("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M:%S")
-
-        # Bezpieczne records
-        def safe_records(df_obj, cols):
-            try:
-                return df_obj[cols].to_dict('records')
-            except Exception:
-                try:
-                    return df_obj.to_dict('records')
-                except Exception:
-                    return []
-
-        errors_data = safe_records(errors, ["Timestamp", "EventType", "Details"])
-        warnings_data = safe_records(warnings, ["Timestamp", "EventType", "Details"])
-        sessions_data = safe_records(sessions_df, ["Player", "Start", "End", "Duration"])
-        admin_data = safe_records(admin_cmds, ["Timestamp", "EventType", "Details"])
+# Podział na serwery (zestawienie i porównanie między serwerami)
+def summarize_servers(df, sessions_df):
+    if df is None or df.empty or "Server" not in df.columns:
+        return []
+    rows = []
+    for server, df_srv in df.groupby("Server", sort=True):
+        timestamps = pd.to_datetime(df_srv["Timestamp"], errors="coerce").dropna()
+        if not sessions_df.empty and "Server" in sessions_df.columns:
+            srv_sessions = sessions_df[sessions_df["Server"] == server]
+        else:
+            srv_sessions = pd.DataFrame(columns=["Player", "Duration"])
+        errors_count = int((df_srv["LineType"] == "ERROR").sum())
+        mod_names = df_srv[df_srv["EventType"] == "mod_load"]["Details"].apply(lambda x: parse_details(x).get("Name"))
+        rows.append({
+            "Server": server,
+            "Events": event_weight(df_srv),
+            "Errors": errors_count,
+            "Warnings": int((df_srv["LineType"] == "WARNING").sum()),
+            "ErrorsPer1k": round(errors_count * 1000 / event_weight(df_srv), 2) if len(df_srv) else 0,
+            "Mods": int(mod_names.nunique()),
+            "Players": int(srv_sessions["Player"].nunique()),
+            "Sessions": len(srv_sessions),
+            "PlayMinutes": round(float(srv_sessions["Duration"].sum()), 2),
+            "First": str(timestamps.min()) if not timestamps.empty else "",
+            "Last": str(timestamps.max()) if not timestamps.empty else "",
+        })
+    return rows
 
-        try:
-            mods_data = df[df["EventType"] == "mod_load"][["Details"]].to_dict('records')
-        except Exception:
-            mods_data = []
+# Warstwa danych wykresów: pełne dane godzinowe tylko dla ostatnich CHART_DETAIL_DAYS dni,
+# starsze dni zwinięte do serii tygodniowej i miesięcznej, długie serie próbkowane LTTB
+CHART_DETAIL_DAYS = 7
+CHART_WEEKLY_WEEKS = 12
+CHART_POINT_BUDGET = 500
 
-        # Podsumowania
-        try:
-            errors_summary = summarize_errors(errors)
-        except Exception:
-            errors_summary = []
-        try:
-            warnings_summary = summarize_warnings(warnings)
-        except Exception:
-            warnings_summary = []
-        try:
-            sessions_summary = summarize_sessions(sessions_df)
-        except Exception:
-            sessions_summary = []
+def lttb(labels, data, threshold):
+    n = len(data)
+    if threshold >= n or threshold < 3:
+        return list(labels), list(data)
+    sampled = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = (avg_start + avg_end - 1) / 2
+        avg_y = sum(data[avg_start:avg_end]) / (avg_end - avg_start)
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        best, best_area = range_start, -1.0
+        ay = data[a]
+        for j in range(range_start, range_end):
+            area = abs((a - avg_x) * (data[j] - ay) - (a - j) * (avg_y - ay))
+            if area > best_area:
+                best_area, best = area, j
+        sampled.append(best)
+        a = best
+    sampled.append(n - 1)
+    return [labels[i] for i in sampled], [data[i] for i in sampled]
 
-        # Admin summary
-        def extract_admin_action(val):
+def bound_chart_history(charts, day_prefix, aggregate_key):
+    charts = charts or {}
+    days = {}
+    bounded = {}
+    # Seria dzienna z archiwum retencji: dni znane tylko jako suma dnia, bez rozkładu na godziny
+    daily_only = charts.get(f"{day_prefix}daily") or {}
+    archived = {datetime.strptime(label, "%Y-%m-%d").date(): value for label, value in zip(daily_only.get("labels", []), daily_only.get("data", []))}
+    for key, value in charts.items():
+        if key == f"{day_prefix}daily":
+            continue
+        if key.startswith(day_prefix):
             try:
-                d = parse_details(val)
-                return d.get("Command", d.get("Message", d.get("User", "Unknown")))
-            except Exception:
-                return "Unknown"
-
-        try:
-            admin_summary = admin_cmds["Details"].apply(extract_admin_action).value_counts().to_dict()
-        except Exception:
-            admin_summary = {}
-
-        # FILTROWANIE: usuń mod_issues z other_charts
-        cleaned_other_charts = {}
-        for k, v in (other_charts or {}).items():
-            if k == "mod_issues" or k.startswith("mod_issues"):
+                days[datetime.strptime(key[len(day_prefix):], "%Y-%m-%d").date()] = value
                 continue
-            cleaned_other_charts[k] = v
+            except ValueError:
+                pass
+        if key != aggregate_key:
+            bounded[key] = value
 
-        # Usuń kumulacyjne
-        filtered_save_charts = {k: v for k, v in (save_charts or {}).items() if k != "saves_all"}
-        filtered_warning_charts = {k: v for k, v in (warning_charts or {}).items() if k != "warnings_per_hour"}
-        filtered_other_charts = {}
-        banned_other = {"events_per_hour"}
-        allowed_aggregates = {"event_types", "admin_commands"}
-        for k, v in cleaned_other_charts.items():
-            if k in banned_other:
+    if days or archived:
+        last_day = max(set(days) | set(archived))
+        weekly, monthly = Counter(), Counter()
+        for day in sorted(set(days) | set(archived)):
+            age = (last_day - day).days
+            if age < CHART_DETAIL_DAYS and day not in archived:
+                bounded[f"{day_prefix}{day}"] = days[day]
                 continue
-            if k.startswith("events_per_hour_") or k in allowed_aggregates:
-                filtered_other_charts[k] = v
+            total = sum(days[day].get("data", [])) if day in days else 0
+            total += archived.get(day, 0)
+            if age < CHART_DETAIL_DAYS + CHART_WEEKLY_WEEKS * 7:
+                iso = day.isocalendar()
+                weekly[f"{iso[0]}-W{iso[1]:02d}"] += total
             else:
-                if isinstance(v, dict):
-                    filtered_other_charts[k] = v
+                monthly[day.strftime("%Y-%m")] += total
+        if weekly:
+            bounded[f"{day_prefix}weekly"] = {"labels": sorted(weekly), "data": [weekly[k] for k in sorted(weekly)], "type": "bar"}
+        if monthly:
+            labels, data = lttb(sorted(monthly), [monthly[k] for k in sorted(monthly)], CHART_POINT_BUDGET)
+            bounded[f"{day_prefix}monthly"] = {"labels": labels, "data": data, "type": "bar"}
 
-        # Przygotowanie danych do wykresów
-        charts_data = {
-            "other_charts": filtered_other_charts or {},
-            "save_charts": filtered_save_charts or {},
-            "warning_charts": filtered_warning_charts or {},
-            "sessions_charts": (
-                {"sessions_total": {
-                    "labels": [row.get("Player", "") for row in sessions_summary],
-                    "data": [row.get("Duration", 0) for row in sessions_summary],
-                    "type": "bar",
-                    "horizontal": True
-                }} if sessions_summary else {}
-            ),
-            "admin_charts": (
-                {"admin_actions": {
-                    "labels": list(admin_summary.keys()),
-                    "data": list(admin_summary.values()),
-                    "type": "bar",
-                    "horizontal": True
-                }} if admin_summary else {}
-            ),
-            "mod_issues": (
-                {"mod_issues": {
-                    "labels": list(mod_issues.keys()),
-                    "data": list(mod_issues.values()),
-                    "type": "bar",
-                    "horizontal": True
-                }} if mod_issues else {}
-            )
+    aggregate = charts.get(aggregate_key) or {}
+    if aggregate.get("labels"):
+        labels, data = lttb(aggregate["labels"], aggregate["data"], CHART_POINT_BUDGET)
+        bounded[f"{day_prefix}history"] = {"labels": labels, "data": data, "type": "line"}
+    return bounded
+
+# Wspólny CSS i JavaScript stron raportu (indeks i strony dzienne)
+REPORT_STYLE = """    <style>
+        .chart-container {
+            position: relative;
+            width: 100%;
+            overflow: hidden;
+            margin-bottom: 1.5rem;
+            padding: 0.5rem 1rem;
+            background-color: #fff;
+            border-radius: 0.5rem;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.08);
+            display: block;
         }
+        .chart-container.flex { display:flex; align-items:center; justify-content:center; }
+        .dark .chart-container { background-color: #111827 }
+        canvas { width: 100%; height: 100%; display: block; }
+        .table-header { cursor: pointer; }
+    </style>
+"""
 
-        # JavaScript
-        javascript_code = """
+REPORT_JAVASCRIPT = """
 document.addEventListener('DOMContentLoaded', () => {
     const toggleButton = document.getElementById('theme-toggle');
     if (toggleButton) {
@@ -782,6 +3271,9 @@ document.addEventListener('DOMContentLoaded', () => {
         sessions_charts:{ title: 'Sesje graczy',   color: '#6366f1', bg: 'rgba(99,102,241,0.35)', defaultType: 'bar', horizontal: true },
         admin_charts:   { title: 'Akcje admina',   color: '#14b8a6', bg: 'rgba(20,184,166,0.35)', defaultType: 'bar', horizontal: true },
         mod_issues:     { title: 'Problemy z modami', color: '#8b5cf6', bg: 'rgba(139,92,246,0.35)', defaultType: 'bar', horizontal: true },
+        network_charts: { title: 'Sieć a rozłączenia', color: '#0ea5e9', bg: 'rgba(14,165,233,0.35)', defaultType: 'bar', horizontal: false },
+        anomaly_charts: { title: 'Anomalie', color: '#dc2626', bg: 'rgba(220,38,38,0.35)', defaultType: 'bar', horizontal: false },
+        server_charts:  { title: 'Porównanie serwerów', color: '#f59e0b', bg: 'rgba(245,158,11,0.35)', defaultType: 'bar', horizontal: false },
     };
 
     function computeHeight(labels, horizontal) {
@@ -881,6 +3373,385 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 """
 
+# Strony dzienne: jedna strona na dzień + hash treści dnia (agregaty godzinowe, wiersze błędów/ostrzeżeń,
+# sesje, anomalie); strony, których treść się nie zmieniła, nie są renderowane ponownie - dopisanie
+# linii do bieżącego pliku logu nie unieważnia poprzednich dni
+def day_page_digest(day, df_day, sessions_day, alerts_day):
+    rollup = weighted_size(df_day, [df_day["Timestamp"].dt.hour, "EventType"])
+    detail = df_day[df_day["LineType"].isin(["ERROR", "WARNING"])]
+    payload = json.dumps({
+        "day": str(day),
+        "rollup": [[int(h), t, int(c)] for (h, t), c in rollup.items()],
+        "details": [[str(ts), etype, ltype, str(details)] for ts, etype, ltype, details in zip(detail["Timestamp"], detail["EventType"], detail["LineType"], detail["Details"])],
+        "sessions": sessions_day.to_dict("records"),
+        "alerts": alerts_day,
+        "version": DAY_PAGE_VERSION,
+    }, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def render_day_page(day, df_day, sessions_day, alerts_day):
+    report_time = datetime.now(ZoneInfo("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M:%S")
+    hours = df_day["Timestamp"].dt.strftime("%H:00")
+    errors_day = df_day[df_day["LineType"] == "ERROR"]
+    warnings_day = df_day[df_day["LineType"] == "WARNING"]
+
+    def per_hour(frame):
+        counts = weighted_size(frame, hours.loc[frame.index])
+        return {"labels": counts.index.tolist(), "data": [int(v) for v in counts.values]}
+
+    charts_data = {
+        "other_charts": {f"events_per_hour_{day}": per_hour(df_day)},
+        "save_charts": {f"saves_{day}": per_hour(df_day[df_day["EventType"] == "save_game"])},
+        "warning_charts": {f"warnings_per_hour_{day}": per_hour(warnings_day)},
+    }
+
+    def detail_rows(frame):
+        return ''.join(
+            f'<tr><td class="p-2">{ts}</td><td class="p-2">{etype}</td><td class="p-2">{html.escape(str(details))}</td></tr>'
+            for ts, etype, details in zip(frame["Timestamp"], frame["EventType"], frame["Details"])
+        )
+
+    return f"""<!DOCTYPE html>
+<html lang="pl">
+<head>
+    <meta charset="UTF-8">
+    <title>Raport FS25 - {day}</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <script src="https://cdn.tailwindcss.com"></script>
+    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.5.0/dist/chart.umd.min.js"></script>
+{REPORT_STYLE}</head>
+<body class="bg-gray-100 dark:bg-gray-900 text-gray-900 dark:text-gray-100 transition-colors duration-300">
+    <nav class="bg-blue-600 dark:bg-blue-800 p-4">
+        <div class="container mx-auto flex justify-between items-center">
+            <h1 class="text-xl font-bold text-white">Raport FS25 - {day}</h1>
+            <div class="space-x-4">
+                <a href="../index.html" class="text-white hover:underline">Raport główny</a>
+                <a href="#errors" class="text-white hover:underline">Błędy</a>
+                <a href="#warnings" class="text-white hover:underline">Ostrzeżenia</a>
+                <a href="#sessions" class="text-white hover:underline">Sesje Graczy</a>
+                <button id="theme-toggle" class="px-4 py-2 bg-blue-500 text-white rounded hover:bg-blue-600">Przełącz motyw</button>
+            </div>
+        </div>
+    </nav>
+
+    <div class="container mx-auto p-6">
+        <p class="mb-6">Wygenerowano: {report_time}</p>
+        <section id="summary" class="mb-8">
+            <div class="grid grid-cols-1 md:grid-cols-4 gap-4">
+                <div class="bg-white dark:bg-gray-800 p-4 rounded shadow"><h3 class="text-lg font-medium">Zdarzenia</h3><p class="text-2xl">{event_weight(df_day)}</p></div>
+                <div class="bg-white dark:bg-gray-800 p-4 rounded shadow"><h3 class="text-lg font-medium">Błędy</h3><p class="text-2xl">{len(errors_day)}</p></div>
+                <div class="bg-white dark:bg-gray-800 p-4 rounded shadow"><h3 class="text-lg font-medium">Ostrzeżenia</h3><p class="text-2xl">{len(warnings_day)}</p></div>
+                <div class="bg-white dark:bg-gray-800 p-4 rounded shadow"><h3 class="text-lg font-medium">Anomalie</h3><p class="text-2xl">{len(alerts_day)}</p></div>
+            </div>
+        </section>
+
+        <section id="charts" class="mb-8">
+            <div class="grid grid-cols-1 md:grid-cols-3 gap-4">
+                <div id="other_charts" class="chart-container"></div>
+                <div id="save_charts" class="chart-container"></div>
+                <div id="warning_charts" class="chart-container"></div>
+            </div>
+            <script id="charts-data" type="application/json">
+                {json.dumps(charts_data, ensure_ascii=False)}
+            </script>
+        </section>
+
+        <section id="errors" class="mb-8">
+            <h2 class="text-2xl font-semibold mb-4">Błędy</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                <thead><tr class="bg-gray-200 dark:bg-gray-700"><th class="p-2 table-header">Timestamp</th><th class="p-2 table-header">Typ zdarzenia</th><th class="p-2 table-header">Szczegóły</th></tr></thead>
+                <tbody>{detail_rows(errors_day)}</tbody>
+            </table>
+        </section>
+
+        <section id="warnings" class="mb-8">
+            <h2 class="text-2xl font-semibold mb-4">Ostrzeżenia</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                <thead><tr class="bg-gray-200 dark:bg-gray-700"><th class="p-2 table-header">Timestamp</th><th class="p-2 table-header">Typ zdarzenia</th><th class="p-2 table-header">Szczegóły</th></tr></thead>
+                <tbody>{detail_rows(warnings_day)}</tbody>
+            </table>
+        </section>
+
+        <section id="sessions" class="mb-8">
+            <h2 class="text-2xl font-semibold mb-4">Sesje graczy</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                <thead><tr class="bg-gray-200 dark:bg-gray-700"><th class="p-2 table-header">Serwer</th><th class="p-2 table-header">Gracz</th><th class="p-2 table-header">Start</th><th class="p-2 table-header">Koniec</th><th class="p-2 table-header">Czas trwania (min)</th></tr></thead>
+                <tbody>{''.join(f'<tr><td class="p-2">{row.get("Server","")}</td><td class="p-2">{row.get("Player","")}</td><td class="p-2">{row.get("Start") or ""}</td><td class="p-2">{row.get("End") or ""}</td><td class="p-2">{float(row.get("Duration",0)):.2f}</td></tr>' for row in sessions_day.to_dict("records"))}</tbody>
+            </table>
+        </section>
+
+        <section id="anomalies" class="mb-8">
+            <h2 class="text-2xl font-semibold mb-4">Anomalie</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                <thead><tr class="bg-gray-200 dark:bg-gray-700"><th class="p-2 table-header">Minuta</th><th class="p-2 table-header">Serwer</th><th class="p-2 table-header">Metryka</th><th class="p-2 table-header">Wartość</th><th class="p-2 table-header">Z-score</th></tr></thead>
+                <tbody>{''.join(f'<tr><td class="p-2">{a["Minute"]}</td><td class="p-2">{a["Server"]}</td><td class="p-2">{a["Metric"]}</td><td class="p-2">{a["Value"]}</td><td class="p-2">{a["ZScore"]}</td></tr>' for a in alerts_day)}</tbody>
+            </table>
+        </section>
+
+        <footer class="text-center text-gray-600 dark:text-gray-400">
+            <p>Wygenerowano przez logs_analyzer.py</p>
+        </footer>
+    </div>
+
+    <script>
+        {REPORT_JAVASCRIPT}
+    </script>
+</body>
+</html>
+"""
+
+def generate_day_pages(df, sessions_df, anomalies=None):
+    pages = []
+    try:
+        if df is None or df.empty:
+            return pages
+        os.makedirs(DAY_PAGES_DIR, exist_ok=True)
+        manifest = {}
+        if os.path.exists(DAY_PAGES_MANIFEST):
+            try:
+                with open(DAY_PAGES_MANIFEST, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (ValueError, OSError) as e:
+                logging.warning(f"⚠️ Nie można wczytać {DAY_PAGES_MANIFEST}: {e}")
+
+        alerts = (anomalies or {}).get("alerts", [])
+        session_days = pd.to_datetime(sessions_df["Start"], errors="coerce").dt.date if not sessions_df.empty else pd.Series(dtype=object)
+        df = df.dropna(subset=["Timestamp"])
+        rendered = skipped = 0
+        for day, df_day in df.groupby(df["Timestamp"].dt.date, sort=True):
+            sessions_day = sessions_df[session_days == day] if not sessions_df.empty else pd.DataFrame()
+            alerts_day = [a for a in alerts if a["Minute"].startswith(str(day))]
+            digest = day_page_digest(day, df_day, sessions_day, alerts_day)
+            page_path = os.path.join(DAY_PAGES_DIR, f"{day}.html")
+            if manifest.get(str(day)) == digest and os.path.exists(page_path):
+                skipped += 1
+            else:
+                with open(page_path, "w", encoding="utf-8") as f:
+                    f.write(render_day_page(day, df_day, sessions_day, alerts_day))
+                manifest[str(day)] = digest
+                rendered += 1
+            pages.append({
+                "Day": str(day),
+                "Events": event_weight(df_day),
+                "Errors": int((df_day["LineType"] == "ERROR").sum()),
+                "Warnings": int((df_day["LineType"] == "WARNING").sum()),
+                "Alerts": len(alerts_day),
+                "Page": f"days/{day}.html",
+            })
+        with open(DAY_PAGES_MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        logging.info(f"🗓️ Strony dzienne: {rendered} wygenerowanych, {skipped} bez zmian.")
+        return pages
+    except Exception as e:
+        with open(ERROR_LOG, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now()}: Błąd w generate_day_pages: {e}\n{traceback.format_exc()}\n")
+        logging.error(f"❌ Błąd w generate_day_pages: {e}")
+        return pages
+
+def generate_html_report(
+    events,
+    event_counts,
+    errors,
+    warnings,
+    warning_types,
+    mod_issues,
+    sessions_df,
+    admin_cmds,
+    save_charts,
+    warning_charts,
+    other_charts,
+    server_summary=None,
+    mod_manifest=None,
+    fingerprints=None,
+    anomalies=None,
+    day_pages=None,
+    concurrency=None,
+    network=None,
+    save_ops=None,
+    history=None,
+    boot_profiles=None,
+    density_budget=None
+):
+    try:
+        server_summary = server_summary or []
+        mod_manifest = mod_manifest or {"mods": [], "changes": []}
+        fingerprints = fingerprints or []
+        anomaly_alerts = (anomalies or {}).get("alerts", [])
+        anomaly_counts = Counter(a["Metric"] for a in anomaly_alerts)
+        concurrency = concurrency or {"hourly": {"labels": [], "data": []}, "daily": []}
+        network = network or {"window": CORRELATION_WINDOW, "players": [], "hours": [], "summary": {}}
+        network_summary = network.get("summary") or {}
+        save_ops = save_ops or {"days": [], "boots": [], "stalls": []}
+        boot_profiles = boot_profiles or {"boots": [], "profiles": []}
+        density_budget = density_budget or {"boots": [], "layers": [], "growth": []}
+        archived = history_totals(history)["all"]
+        archived_templates = sorted(
+            ((month, template, count) for server_templates in (history or {}).get("templates", {}).values() for month, templates in server_templates.items() for template, count in templates.items()),
+            key=lambda row: (row[0], row[2]), reverse=True
+        )
+        save_day_rows = [row for row in save_ops["days"] if row["Measured"]]
+        concurrent_labels, concurrent_data = lttb(concurrency["hourly"]["labels"], concurrency["hourly"]["data"], CHART_POINT_BUDGET)
+        report_time = datetime.now(ZoneInfo("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M:%S")
+
+        # Bezpieczne records
+        def safe_records(df_obj, cols):
+            try:
+                return df_obj[cols].to_dict('records')
+            except Exception:
+                try:
+                    return df_obj.to_dict('records')
+                except Exception:
+                    return []
+
+        sessions_data = safe_records(sessions_df, ["Server", "Player", "Start", "End", "Duration"])
+        admin_data = safe_records(admin_cmds, ["Timestamp", "EventType", "Details"])
+
+        mods_data = mod_manifest.get("mods", [])
+        mod_changes = mod_manifest.get("changes", [])
+
+        def day_link(row):
+            if not row["Page"]:
+                return f'{row["Day"]} (archiwum)'
+            return f'<a href="{row["Page"]}" class="text-blue-600 dark:text-blue-400 hover:underline">{row["Day"]}</a>'
+
+        def percent(value):
+            return f"{value:.1%}" if value is not None else ""
+
+        def format_mod_list(items, changed=False):
+            if changed:
+                return ", ".join(f'{m["Name"]} {m["OldVersion"]} → {m["NewVersion"]}' + ("" if m["OldVersion"] != m["NewVersion"] or not m["HashChanged"] else " (hash)") for m in items)
+            return ", ".join(f'{m["Name"]} {m["Version"]}' for m in items)
+
+        # Podsumowania
+        try:
+            errors_summary = summarize_errors(errors)
+        except Exception:
+            errors_summary = []
+        try:
+            warnings_summary = summarize_warnings(warnings)
+        except Exception:
+            warnings_summary = []
+        try:
+            sessions_summary = summarize_sessions(sessions_df)
+        except Exception:
+            sessions_summary = []
+
+        # Admin summary
+        def extract_admin_action(val):
+            try:
+                d = parse_details(val)
+                return d.get("Command", d.get("Message", d.get("User", "Unknown")))
+            except Exception:
+                return "Unknown"
+
+        try:
+            admin_summary = admin_cmds["Details"].apply(extract_admin_action).value_counts().to_dict()
+        except Exception:
+            admin_summary = {}
+
+        # FILTROWANIE: usuń mod_issues z other_charts
+        cleaned_other_charts = {}
+        for k, v in (other_charts or {}).items():
+            if k == "mod_issues" or k.startswith("mod_issues"):
+                continue
+            cleaned_other_charts[k] = v
+
+        # Ograniczenie rozmiaru danych wykresów (ostatnie dni szczegółowo, starsze zwinięte)
+        cleaned_other_charts = bound_chart_history(cleaned_other_charts, "events_per_hour_", "events_per_hour")
+        filtered_save_charts = bound_chart_history(save_charts, "saves_", "saves_all")
+        filtered_warning_charts = bound_chart_history(warning_charts, "warnings_per_hour_", "warnings_per_hour")
+        filtered_other_charts = {}
+        banned_other = {"events_per_hour"}
+        allowed_aggregates = {"event_types", "admin_commands"}
+        for k, v in cleaned_other_charts.items():
+            if k in banned_other:
+                continue
+            if k.startswith("events_per_hour_") or k in allowed_aggregates:
+                filtered_other_charts[k] = v
+            else:
+                if isinstance(v, dict):
+                    filtered_other_charts[k] = v
+
+        # Przygotowanie danych do wykresów
+        charts_data = {
+            "other_charts": filtered_other_charts or {},
+            "save_charts": {
+                **(filtered_save_charts or {}),
+                **({"save_duration_p95": {
+                    "labels": [row["Day"] for row in save_day_rows],
+                    "data": [row["P95"] for row in save_day_rows],
+                    "type": "line"
+                }} if save_day_rows else {})
+            },
+            "warning_charts": filtered_warning_charts or {},
+            "sessions_charts": {
+                **({"sessions_total": {
+                    "labels": [row.get("Player", "") for row in sessions_summary],
+                    "data": [row.get("Duration", 0) for row in sessions_summary],
+                    "type": "bar",
+                    "horizontal": True
+                }} if sessions_summary else {}),
+                **({"concurrent_players": {
+                    "labels": concurrent_labels,
+                    "data": concurrent_data,
+                    "type": "line",
+                    "horizontal": False
+                }} if concurrent_labels else {})
+            },
+            "admin_charts": (
+                {"admin_actions": {
+                    "labels": list(admin_summary.keys()),
+                    "data": list(admin_summary.values()),
+                    "type": "bar",
+                    "horizontal": True
+                }} if admin_summary else {}
+            ),
+            "mod_issues": (
+                {"mod_issues": {
+                    "labels": list(mod_issues.keys())[:MOD_ISSUES_CHART_TOP],
+                    "data": list(mod_issues.values())[:MOD_ISSUES_CHART_TOP],
+                    "type": "bar",
+                    "horizontal": True
+                }} if mod_issues else {}
+            ),
+            "server_charts": (
+                {key: {
+                    "labels": [row["Server"] for row in server_summary],
+                    "data": [row[field] for row in server_summary],
+                    "type": "bar"
+                } for key, field in [
+                    ("server_events", "Events"),
+                    ("server_errors", "Errors"),
+                    ("server_warnings", "Warnings"),
+                    ("server_errors_per_1k", "ErrorsPer1k"),
+                    ("server_play_minutes", "PlayMinutes"),
+                ]} if len(server_summary) > 1 else {}
+            ),
+            "network_charts": (
+                {"network_correlation_by_hour": {
+                    "labels": [f'{row["Hour"]:02d}:00' for row in network["hours"]],
+                    "data": [round(row["Rate"] * 100, 1) for row in network["hours"]],
+                    "type": "bar"
+                }, "network_correlated_by_player": {
+                    "labels": [row["Player"] for row in network["players"][:20]],
+                    "data": [int(row["Correlated"]) for row in network["players"][:20]],
+                    "type": "bar",
+                    "horizontal": True
+                }} if network_summary else {}
+            ),
+            "anomaly_charts": (
+                {"anomalies_by_metric": {
+                    "labels": list(anomaly_counts.keys()),
+                    "data": list(anomaly_counts.values()),
+                    "type": "bar"
+                }} if anomaly_counts else {}
+            )
+        }
+
+        charts_json = json.dumps(charts_data, ensure_ascii=False)
+        logging.info(f"📊 Dane wykresów w raporcie: {len(charts_json) / 1024:.1f} KB")
+
+
         # HTML
         html_content = f"""<!DOCTYPE html>
 <html lang="pl">
@@ -890,33 +3761,23 @@ document.addEventListener('DOMContentLoaded', () => {
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <script src="https://cdn.tailwindcss.com"></script>
     <script src="https://cdn.jsdelivr.net/npm/chart.js@4.5.0/dist/chart.umd.min.js"></script>
-    <style>
-        .chart-container {{
-            position: relative;
-            width: 100%;
-            overflow: hidden;
-            margin-bottom: 1.5rem;
-            padding: 0.5rem 1rem;
-            background-color: #fff;
-            border-radius: 0.5rem;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.08);
-            display: block;
-        }}
-        .chart-container.flex {{ display:flex; align-items:center; justify-content:center; }}
-        .dark .chart-container {{ background-color: #111827 }}
-        canvas {{ width: 100%; height: 100%; display: block; }}
-        .table-header {{ cursor: pointer; }}
-    </style>
-</head>
+{REPORT_STYLE}</head>
 <body class="bg-gray-100 dark:bg-gray-900 text-gray-900 dark:text-gray-100 transition-colors duration-300">
     <nav class="bg-blue-600 dark:bg-blue-800 p-4">
         <div class="container mx-auto flex justify-between items-center">
             <h1 class="text-xl font-bold text-white">Raport FS25</h1>
             <div class="space-x-4">
                 <a href="#summary" class="text-white hover:underline">Podsumowanie</a>
+                <a href="#days" class="text-white hover:underline">Dni</a>
+                <a href="#servers" class="text-white hover:underline">Serwery</a>
                 <a href="#charts" class="text-white hover:underline">Wykresy</a>
                 <a href="#errors" class="text-white hover:underline">Błędy</a>
                 <a href="#warnings" class="text-white hover:underline">Ostrzeżenia</a>
+                <a href="#anomalies" class="text-white hover:underline">Anomalie</a>
+                <a href="#saves" class="text-white hover:underline">Zapisy</a>
+                <a href="#boots" class="text-white hover:underline">Uruchomienia</a>
+                <a href="#density" class="text-white hover:underline">Mapy gęstości</a>
+                <a href="#network" class="text-white hover:underline">Sieć</a>
                 <a href="#sessions" class="text-white hover:underline">Sesje Graczy</a>
                 <a href="#admin" class="text-white hover:underline">Akcje Admina</a>
                 <a href="#mods" class="text-white hover:underline">Mody</a>
@@ -935,23 +3796,23 @@ document.addEventListener('DOMContentLoaded', () => {
             <div class="grid grid-cols-1 md:grid-cols-3 gap-4">
                 <div class="bg-white dark:bg-gray-800 p-4 rounded shadow">
                     <h3 class="text-lg font-medium">Liczba zdarzeń</h3>
-                    <p class="text-2xl">{len(events)}</p>
+                    <p class="text-2xl">{sum(e.Count for e in events) + archived["Events"]}</p>
                 </div>
                 <div class="bg-white dark:bg-gray-800 p-4 rounded shadow">
                     <h3 class="text-lg font-medium">Błędy</h3>
-                    <p class="text-2xl">{len(errors)}</p>
+                    <p class="text-2xl">{len(errors) + archived["Errors"]}</p>
                 </div>
                 <div class="bg-white dark:bg-gray-800 p-4 rounded shadow">
                     <h3 class="text-lg font-medium">Ostrzeżenia</h3>
-                    <p class="text-2xl">{len(warnings)}</p>
+                    <p class="text-2xl">{len(warnings) + archived["Warnings"]}</p>
                 </div>
                 <div class="bg-white dark:bg-gray-800 p-4 rounded shadow">
                     <h3 class="text-lg font-medium">Mody</h3>
-                    <p class="text-2xl">{len(df[df['EventType']=='mod_load'])}</p>
+                    <p class="text-2xl">{len({m["Name"] for m in mods_data if m["Kind"] == "mod"})}</p>
                 </div>
                 <div class="bg-white dark:bg-gray-800 p-4 rounded shadow">
                     <h3 class="text-lg font-medium">DLC</h3>
-                    <p class="text-2xl">{len(df[df['EventType']=='dlc_load'])}</p>
+                    <p class="text-2xl">{len({m["Name"] for m in mods_data if m["Kind"] == "dlc"})}</p>
                 </div>
                 <div class="bg-white dark:bg-gray-800 p-4 rounded shadow">
                     <h3 class="text-lg font-medium">Sesje graczy</h3>
@@ -960,6 +3821,52 @@ document.addEventListener('DOMContentLoaded', () => {
             </div>
         </section>
 
+        <!-- Strony dzienne -->
+        <section id="days" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Raporty dzienne</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Dzień</th>
+                        <th class="p-2 table-header">Zdarzenia</th>
+                        <th class="p-2 table-header">Błędy</th>
+                        <th class="p-2 table-header">Ostrzeżenia</th>
+                        <th class="p-2 table-header">Anomalie</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{day_link(row)}</td><td class="p-2">{row["Events"]}</td><td class="p-2">{row["Errors"]}</td><td class="p-2">{row["Warnings"]}</td><td class="p-2">{row["Alerts"]}</td></tr>' for row in reversed(day_pages or [])])}
+                </tbody>
+            </table>
+        </section>
+
+        <!-- Serwery -->
+        <section id="servers" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Serwery</h2>
+            <div class="overflow-x-auto">
+                <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                    <thead>
+                        <tr class="bg-gray-200 dark:bg-gray-700">
+                            <th class="p-2 table-header">Serwer</th>
+                            <th class="p-2 table-header">Zdarzenia</th>
+                            <th class="p-2 table-header">Błędy</th>
+                            <th class="p-2 table-header">Ostrzeżenia</th>
+                            <th class="p-2 table-header">Błędy / 1000 zdarzeń</th>
+                            <th class="p-2 table-header">Mody</th>
+                            <th class="p-2 table-header">Gracze</th>
+                            <th class="p-2 table-header">Sesje</th>
+                            <th class="p-2 table-header">Czas gry (min)</th>
+                            <th class="p-2 table-header">Od</th>
+                            <th class="p-2 table-header">Do</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {''.join([f'<tr><td class="p-2">{row["Server"]}</td><td class="p-2">{row["Events"]}</td><td class="p-2">{row["Errors"]}</td><td class="p-2">{row["Warnings"]}</td><td class="p-2">{row["ErrorsPer1k"]:.2f}</td><td class="p-2">{row["Mods"]}</td><td class="p-2">{row["Players"]}</td><td class="p-2">{row["Sessions"]}</td><td class="p-2">{row["PlayMinutes"]:.2f}</td><td class="p-2">{row["First"]}</td><td class="p-2">{row["Last"]}</td></tr>' for row in server_summary])}
+                    </tbody>
+                </table>
+            </div>
+        </section>
+
         <!-- Wykresy -->
         <section id="charts" class="mb-8 fade-in">
             <h2 class="text-2xl font-semibold mb-4">Wykresy</h2>
@@ -970,9 +3877,12 @@ document.addEventListener('DOMContentLoaded', () => {
                 <div id="sessions_charts" class="chart-container"></div>
                 <div id="admin_charts" class="chart-container"></div>
                 <div id="mod_issues" class="chart-container"></div>
+                <div id="server_charts" class="chart-container"></div>
+                <div id="anomaly_charts" class="chart-container"></div>
+                <div id="network_charts" class="chart-container"></div>
             </div>
             <script id="charts-data" type="application/json">
-                {json.dumps(charts_data, ensure_ascii=False)}
+                {charts_json}
             </script>
         </section>
 
@@ -990,20 +3900,42 @@ document.addEventListener('DOMContentLoaded', () => {
                     {''.join([f'<tr><td class="p-2">{row.get("Message","")}</td><td class="p-2">{row.get("Count",0)}</td></tr>' for row in errors_summary])}
                 </tbody>
             </table>
-            <details class="mb-4">
-                <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Pokaż pełne dane błędów</summary>
-                <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+            <h3 class="text-xl font-semibold mb-2">Unikalne problemy ({len(fingerprints)})</h3>
+            <div class="overflow-x-auto">
+                <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
                     <thead>
                         <tr class="bg-gray-200 dark:bg-gray-700">
-                            <th class="p-2 table-header">Timestamp</th>
-                            <th class="p-2 table-header">Typ zdarzenia</th>
-                            <th class="p-2 table-header">Szczegóły</th>
+                            <th class="p-2 table-header">Fingerprint</th>
+                            <th class="p-2 table-header">Typ</th>
+                            <th class="p-2 table-header">Wiadomość</th>
+                            <th class="p-2 table-header">Głębokość stosu</th>
+                            <th class="p-2 table-header">Liczba</th>
+                            <th class="p-2 table-header">Pierwszy raz</th>
+                            <th class="p-2 table-header">Ostatni raz</th>
                         </tr>
                     </thead>
                     <tbody>
-                        {''.join([f'<tr><td class="p-2">{str(row.get("Timestamp",""))}</td><td class="p-2">{row.get("EventType","")}</td><td class="p-2">{str(row.get("Details",""))}</td></tr>' for row in errors_data])}
+                        {''.join([f'<tr><td class="p-2">{row["Fingerprint"]}</td><td class="p-2">{row["LineType"]}</td><td class="p-2"><details><summary>{html.escape(str(row["Message"])[:200])}</summary><pre class="text-xs whitespace-pre-wrap">{html.escape(row["Sample"])}</pre></details></td><td class="p-2">{row["StackDepth"]}</td><td class="p-2">{row["Count"]}</td><td class="p-2">{row["FirstSeen"] or ""}</td><td class="p-2">{row["LastSeen"] or ""}</td></tr>' for row in fingerprints[:200]])}
                     </tbody>
                 </table>
+            </div>
+            <p class="mb-4 text-sm text-gray-600 dark:text-gray-400">Pełne dane błędów znajdują się na <a href="#days" class="text-blue-600 dark:text-blue-400 hover:underline">stronach dziennych</a>.</p>
+            <details class="mb-4">
+                <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Najczęstsze problemy z archiwum (miesiące poza oknem surowych logów)</summary>
+                <div class="overflow-x-auto mt-3">
+                    <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                        <thead>
+                            <tr class="bg-gray-200 dark:bg-gray-700">
+                                <th class="p-2 table-header">Miesiąc</th>
+                                <th class="p-2 table-header">Szablon</th>
+                                <th class="p-2 table-header">Liczba</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {''.join([f'<tr><td class="p-2">{month}</td><td class="p-2">{html.escape(template)}</td><td class="p-2">{count}</td></tr>' for month, template, count in archived_templates[:200]])}
+                        </tbody>
+                    </table>
+                </div>
             </details>
         </section>
 
@@ -1021,23 +3953,227 @@ document.addEventListener('DOMContentLoaded', () => {
                     {''.join([f'<tr><td class="p-2">{row.get("Message","")}</td><td class="p-2">{row.get("Count",0)}</td></tr>' for row in warnings_summary])}
                 </tbody>
             </table>
+            <p class="mb-4 text-sm text-gray-600 dark:text-gray-400">Pełne dane ostrzeżeń znajdują się na <a href="#days" class="text-blue-600 dark:text-blue-400 hover:underline">stronach dziennych</a>.</p>
+        </section>
+
+        <!-- Anomalie -->
+        <section id="anomalies" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Anomalie ({len(anomaly_alerts)})</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Minuta</th>
+                        <th class="p-2 table-header">Serwer</th>
+                        <th class="p-2 table-header">Metryka</th>
+                        <th class="p-2 table-header">Wartość</th>
+                        <th class="p-2 table-header">Linia bazowa</th>
+                        <th class="p-2 table-header">Z-score</th>
+                        <th class="p-2 table-header">Poziom</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{a["Minute"]}</td><td class="p-2">{a["Server"]}</td><td class="p-2">{a["Metric"]}</td><td class="p-2">{a["Value"]}</td><td class="p-2">{a["Baseline"]}</td><td class="p-2">{a["ZScore"]}</td><td class="p-2">{a["Severity"]}</td></tr>' for a in reversed(anomaly_alerts[-100:])])}
+                </tbody>
+            </table>
+        </section>
+
+        <!-- Zapisy gry -->
+        <section id="saves" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Zapisy gry</h2>
+            <p class="mb-4">Czas autozapisu to odstęp od poprzedniego autozapisu minus wykryty interwał autozapisu (logi mają zwykle tylko linie zakończenia), więc jest szacunkiem. Zacięcie: szacunek powyżej {SAVE_STALL_ESTIMATED_SECONDS} s, zapis z parą linii start/koniec powyżej {SAVE_STALL_SECONDS} s albo „Saving while already saving”.</p>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Dzień</th>
+                        <th class="p-2 table-header">Zapisy</th>
+                        <th class="p-2 table-header">Z szacunkiem</th>
+                        <th class="p-2 table-header">p50 szac. (s)</th>
+                        <th class="p-2 table-header">p95 szac. (s)</th>
+                        <th class="p-2 table-header">Maks. szac. (s)</th>
+                        <th class="p-2 table-header">Zacięcia</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{row["Day"]}</td><td class="p-2">{row["Saves"]}</td><td class="p-2">{row["Measured"]}</td><td class="p-2">{row["P50"] if row["P50"] is not None else ""}</td><td class="p-2">{row["P95"] if row["P95"] is not None else ""}</td><td class="p-2">{row["Max"] if row["Max"] is not None else ""}</td><td class="p-2">{row["Stalls"]}</td></tr>' for row in reversed(save_ops["days"])])}
+                </tbody>
+            </table>
             <details class="mb-4">
-                <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Pokaż pełne dane ostrzeżeń</summary>
-                <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Szacowane czasy zapisu wg uruchomienia serwera</summary>
+                <div class="overflow-x-auto mt-3">
+                    <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                        <thead>
+                            <tr class="bg-gray-200 dark:bg-gray-700">
+                                <th class="p-2 table-header">Serwer</th>
+                                <th class="p-2 table-header">Uruchomienie</th>
+                                <th class="p-2 table-header">Zapisy</th>
+                                <th class="p-2 table-header">Z szacunkiem</th>
+                                <th class="p-2 table-header">p50 szac. (s)</th>
+                                <th class="p-2 table-header">p95 szac. (s)</th>
+                                <th class="p-2 table-header">Maks. szac. (s)</th>
+                                <th class="p-2 table-header">Zacięcia</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {''.join([f'<tr><td class="p-2">{row["Server"]}</td><td class="p-2">{row["Boot"]}</td><td class="p-2">{row["Saves"]}</td><td class="p-2">{row["Measured"]}</td><td class="p-2">{row["P50"] if row["P50"] is not None else ""}</td><td class="p-2">{row["P95"] if row["P95"] is not None else ""}</td><td class="p-2">{row["Max"] if row["Max"] is not None else ""}</td><td class="p-2">{row["Stalls"]}</td></tr>' for row in reversed(save_ops["boots"])])}
+                        </tbody>
+                    </table>
+                </div>
+            </details>
+            <h3 class="text-xl font-semibold mb-2">Zacięcia zapisu ({len(save_ops["stalls"])})</h3>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Czas</th>
+                        <th class="p-2 table-header">Serwer</th>
+                        <th class="p-2 table-header">Uruchomienie</th>
+                        <th class="p-2 table-header">Rodzaj</th>
+                        <th class="p-2 table-header">Sekundy</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{row["Time"]}</td><td class="p-2">{row["Server"]}</td><td class="p-2">{row["Boot"]}</td><td class="p-2">{row["Kind"]}</td><td class="p-2">{row["Seconds"] if row["Seconds"] is not None else ""}</td></tr>' for row in reversed(save_ops["stalls"][-100:])])}
+                </tbody>
+            </table>
+        </section>
+
+        <!-- Profil wydajności uruchomień -->
+        <section id="boots" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Profil wydajności uruchomień</h2>
+            <div class="overflow-x-auto">
+                <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
                     <thead>
                         <tr class="bg-gray-200 dark:bg-gray-700">
-                            <th class="p-2 table-header">Timestamp</th>
-                            <th class="p-2 table-header">Typ zdarzenia</th>
-                            <th class="p-2 table-header">Szczegóły</th>
+                            <th class="p-2 table-header">Konfiguracja</th>
+                            <th class="p-2 table-header">CPU</th>
+                            <th class="p-2 table-header">Rdzenie</th>
+                            <th class="p-2 table-header">Pamięć</th>
+                            <th class="p-2 table-header">Profil sprzętowy</th>
+                            <th class="p-2 table-header">Wersja gry</th>
+                            <th class="p-2 table-header">Uruchomienia</th>
+                            <th class="p-2 table-header">Okres</th>
+                            <th class="p-2 table-header">Wczytywanie (s)</th>
+                            <th class="p-2 table-header">Gotowość (s)</th>
+                            <th class="p-2 table-header">Zapis śr. szac. (s)</th>
+                            <th class="p-2 table-header">Lua maks. (MB)</th>
+                            <th class="p-2 table-header">Błędy startowe</th>
+                            <th class="p-2 table-header">Błędy / h</th>
                         </tr>
                     </thead>
                     <tbody>
-                        {''.join([f'<tr><td class="p-2">{str(row.get("Timestamp",""))}</td><td class="p-2">{row.get("EventType","")}</td><td class="p-2">{str(row.get("Details",""))}</td></tr>' for row in warnings_data])}
+                        {''.join([f'<tr><td class="p-2">{row["Profile"]}</td><td class="p-2">{row.get("CPU", "")}</td><td class="p-2">{row.get("Cores", "")}</td><td class="p-2">{row.get("Memory", "")}</td><td class="p-2">{row.get("Level", "")}</td><td class="p-2">{row.get("Game", "")}</td><td class="p-2">{row["Boots"]}</td><td class="p-2">{row["FirstSeen"]} – {row["LastSeen"]}</td><td class="p-2">{row["LoadSeconds"] if row["LoadSeconds"] is not None else ""}</td><td class="p-2">{row["ReadySeconds"] if row["ReadySeconds"] is not None else ""}</td><td class="p-2">{row["SaveAvgSeconds"] if row["SaveAvgSeconds"] is not None else ""}</td><td class="p-2">{row["LuaPeakMB"] if row["LuaPeakMB"] is not None else ""}</td><td class="p-2">{row["StartupErrors"] if row["StartupErrors"] is not None else ""}</td><td class="p-2">{row["ErrorsPerHour"] if row["ErrorsPerHour"] is not None else ""}</td></tr>' for row in boot_profiles["profiles"]])}
                     </tbody>
                 </table>
+            </div>
+            <details class="mb-4" open>
+                <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Uruchomienia serwera (podświetlone: zmiana sprzętu lub ustawień)</summary>
+                <div class="overflow-x-auto mt-3">
+                    <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                        <thead>
+                            <tr class="bg-gray-200 dark:bg-gray-700">
+                                <th class="p-2 table-header">Serwer</th>
+                                <th class="p-2 table-header">Uruchomienie</th>
+                                <th class="p-2 table-header">Konfiguracja</th>
+                                <th class="p-2 table-header">Pliki startowe</th>
+                                <th class="p-2 table-header">Wczytywanie (s)</th>
+                                <th class="p-2 table-header">Gotowość (s)</th>
+                                <th class="p-2 table-header">Zapis śr. szac. (s)</th>
+                                <th class="p-2 table-header">Lua maks. (MB)</th>
+                                <th class="p-2 table-header">Czas pracy (h)</th>
+                                <th class="p-2 table-header">Błędy startowe</th>
+                                <th class="p-2 table-header">Błędy / h</th>
+                                <th class="p-2 table-header">Zmiany</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {''.join([f'<tr class="{"bg-yellow-100 dark:bg-yellow-900" if row["Changes"] else ""}"><td class="p-2">{row["Server"]}</td><td class="p-2">{row["BootTime"]}</td><td class="p-2">{row["Profile"]}</td><td class="p-2">{row["LoadFiles"]}</td><td class="p-2">{row["LoadSeconds"]}</td><td class="p-2">{row["ReadySeconds"] if row["ReadySeconds"] is not None else ""}</td><td class="p-2">{row["SaveAvgSeconds"] if row["SaveAvgSeconds"] is not None else ""}</td><td class="p-2">{row["LuaPeakMB"] if row["LuaPeakMB"] is not None else ""}</td><td class="p-2">{row["UptimeHours"]}</td><td class="p-2">{row["StartupErrors"]}</td><td class="p-2">{row["ErrorsPerHour"] if row["ErrorsPerHour"] is not None else ""}</td><td class="p-2">{"; ".join(row["Changes"])}</td></tr>' for row in reversed(boot_profiles["boots"])])}
+                        </tbody>
+                    </table>
+                </div>
             </details>
         </section>
 
+        <!-- Budżet pamięci map gęstości -->
+        <section id="density" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Budżet pamięci map gęstości</h2>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Serwer</th>
+                        <th class="p-2 table-header">Warstwa</th>
+                        <th class="p-2 table-header">Uruchomienia</th>
+                        <th class="p-2 table-header">Ostatnie</th>
+                        <th class="p-2 table-header">Szczyt (MB)</th>
+                        <th class="p-2 table-header">Maks. (MB)</th>
+                        <th class="p-2 table-header">Budżet (MB)</th>
+                        <th class="p-2 table-header">Wykorzystanie</th>
+                        <th class="p-2 table-header">Trend (MB)</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr class="{"bg-yellow-100 dark:bg-yellow-900" if row["NearBudget"] or row["Grew"] else ""}"><td class="p-2">{row["Server"]}</td><td class="p-2">{row["Layer"]}</td><td class="p-2">{row["Boots"]}</td><td class="p-2">{row["LastBoot"]}</td><td class="p-2">{row["PeakMB"]}</td><td class="p-2">{row["MaxPeakMB"]}</td><td class="p-2">{row["BudgetMB"]}</td><td class="p-2">{percent(row["Usage"])}</td><td class="p-2">{" → ".join(str(value) for value in row["Trend"])}</td></tr>' for row in density_budget["layers"]])}
+                </tbody>
+            </table>
+            <h3 class="text-xl font-semibold mb-2">Wzrost warstw między uruchomieniami ({len(density_budget["growth"])})</h3>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Serwer</th>
+                        <th class="p-2 table-header">Warstwa</th>
+                        <th class="p-2 table-header">Uruchomienie</th>
+                        <th class="p-2 table-header">Poprzednie</th>
+                        <th class="p-2 table-header">Przed / po (MB)</th>
+                        <th class="p-2 table-header">Wzrost (MB)</th>
+                        <th class="p-2 table-header">Wykorzystanie</th>
+                        <th class="p-2 table-header">Zmiana modów</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{row["Server"]}</td><td class="p-2">{row["Layer"]}</td><td class="p-2">{row["BootTime"]}</td><td class="p-2">{row["PrevBootTime"]}</td><td class="p-2">{row["BeforeMB"]} / {row["AfterMB"]}</td><td class="p-2">+{row["DeltaMB"]}</td><td class="p-2">{percent(row["Usage"])}</td><td class="p-2">{"tak" if row["ModsChanged"] else "nie"}</td></tr>' for row in reversed(density_budget["growth"])])}
+                </tbody>
+            </table>
+            <details class="mb-4">
+                <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Suma warstw wg uruchomienia serwera</summary>
+                <div class="overflow-x-auto mt-3">
+                    <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
+                        <thead>
+                            <tr class="bg-gray-200 dark:bg-gray-700">
+                                <th class="p-2 table-header">Serwer</th>
+                                <th class="p-2 table-header">Uruchomienie</th>
+                                <th class="p-2 table-header">Warstwy</th>
+                                <th class="p-2 table-header">Szczyt (MB)</th>
+                                <th class="p-2 table-header">Budżet (MB)</th>
+                                <th class="p-2 table-header">Wykorzystanie</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {''.join([f'<tr><td class="p-2">{row["Server"]}</td><td class="p-2">{row["BootTime"]}</td><td class="p-2">{row["Layers"]}</td><td class="p-2">{row["PeakMB"]}</td><td class="p-2">{row["BudgetMB"]}</td><td class="p-2">{percent(row["Usage"])}</td></tr>' for row in reversed(density_budget["boots"])])}
+                        </tbody>
+                    </table>
+                </div>
+            </details>
+        </section>
+
+        <!-- Sieć a rozłączenia -->
+        <section id="network" class="mb-8 fade-in">
+            <h2 class="text-2xl font-semibold mb-4">Sieć a rozłączenia</h2>
+            <p class="mb-4">Rozłączenia poprzedzone ostrzeżeniem sieciowym w ciągu {network["window"]} s: {network_summary.get("Correlated", 0)} / {network_summary.get("Disconnects", 0)} ({network_summary.get("Rate", 0):.1%}; utrata połączenia {network_summary.get("LostRate", 0):.1%}, wyjście {network_summary.get("LeftRate", 0):.1%}). Linia bazowa (losowa chwila): {network_summary.get("Baseline", 0):.1%}.</p>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Gracz</th>
+                        <th class="p-2 table-header">Rozłączenia</th>
+                        <th class="p-2 table-header">Utrata połączenia</th>
+                        <th class="p-2 table-header">Z ostrzeżeniem sieciowym</th>
+                        <th class="p-2 table-header">Ostrzeżenia w oknach</th>
+                        <th class="p-2 table-header">Odsetek</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{row["Player"]}</td><td class="p-2">{row["Disconnects"]}</td><td class="p-2">{row["Lost"]}</td><td class="p-2">{row["Correlated"]}</td><td class="p-2">{row["Warnings"]}</td><td class="p-2">{row["Rate"]:.1%}</td></tr>' for row in network["players"]])}
+                </tbody>
+            </table>
+        </section>
+
         <!-- Sesje graczy -->
         <section id="sessions" class="mb-8 fade-in">
             <h2 class="text-2xl font-semibold mb-4">Sesje graczy</h2>
@@ -1052,12 +4188,26 @@ document.addEventListener('DOMContentLoaded', () => {
                     {''.join([f'<tr><td class="p-2">{row.get("Player","")}</td><td class="p-2">{row.get("Duration",0):.2f}</td></tr>' for row in sessions_summary])}
                 </tbody>
             </table>
+            <h3 class="text-xl font-semibold mb-2">Szczyt graczy online (dzień)</h3>
+            <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                <thead>
+                    <tr class="bg-gray-200 dark:bg-gray-700">
+                        <th class="p-2 table-header">Dzień</th>
+                        <th class="p-2 table-header">Szczyt graczy</th>
+                        <th class="p-2 table-header">Moment szczytu</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {''.join([f'<tr><td class="p-2">{row["Day"]}</td><td class="p-2">{row["Peak"]}</td><td class="p-2">{row["At"]}</td></tr>' for row in reversed(concurrency["daily"])])}
+                </tbody>
+            </table>
             <details class="mb-4">
                 <summary class="cursor-pointer text-blue-600 dark:text-blue-400">Pokaż pełne dane sesji</summary>
                 <div class="overflow-x-auto mt-3">
                     <table class="w-full bg-white dark:bg-gray-800 rounded shadow sortable">
                         <thead>
                             <tr class="bg-gray-200 dark:bg-gray-700">
+                                <th class="p-2 table-header">Serwer</th>
                                 <th class="p-2 table-header">Gracz</th>
                                 <th class="p-2 table-header">Start</th>
                                 <th class="p-2 table-header">Koniec</th>
@@ -1065,7 +4215,7 @@ document.addEventListener('DOMContentLoaded', () => {
                             </tr>
                         </thead>
                         <tbody>
-                            {''.join([f'<tr><td class="p-2">{row.get("Player","")}</td><td class="p-2">{(row.get("Start") or "")}</td><td class="p-2">{(row.get("End") or "")}</td><td class="p-2">{float(row.get("Duration",0)):.2f}</td></tr>' for row in sessions_data])}
+                            {''.join([f'<tr><td class="p-2">{row.get("Server","")}</td><td class="p-2">{row.get("Player","")}</td><td class="p-2">{(row.get("Start") or "")}</td><td class="p-2">{(row.get("End") or "")}</td><td class="p-2">{float(row.get("Duration",0)):.2f}</td></tr>' for row in sessions_data])}
                         </tbody>
                     </table>
                 </div>
@@ -1095,14 +4245,39 @@ document.addEventListener('DOMContentLoaded', () => {
                 <thead>
                     <tr class="bg-gray-200 dark:bg-gray-700">
                         <th class="p-2 table-header">Nazwa</th>
+                        <th class="p-2 table-header">Typ</th>
                         <th class="p-2 table-header">Hash</th>
                         <th class="p-2 table-header">Wersja</th>
+                        <th class="p-2 table-header">Uruchomienia</th>
+                        <th class="p-2 table-header">Pierwszy raz</th>
+                        <th class="p-2 table-header">Ostatni raz</th>
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join([f'<tr><td class="p-2">{(row.get("Details") or {}).get("Name","")}</td><td class="p-2">{(row.get("Details") or {}).get("Hash","")}</td><td class="p-2">{(row.get("Details") or {}).get("Version","")}</td></tr>' for row in mods_data])}
+                    {''.join([f'<tr><td class="p-2">{row["Name"]}</td><td class="p-2">{row["Kind"]}</td><td class="p-2">{row["Hash"]}</td><td class="p-2">{row["Version"]}</td><td class="p-2">{row["Boots"]}</td><td class="p-2">{row["FirstSeen"]}</td><td class="p-2">{row["LastSeen"]}</td></tr>' for row in mods_data])}
                 </tbody>
             </table>
+            <h3 class="text-xl font-semibold mb-2">Zmiany modów między uruchomieniami</h3>
+            <div class="overflow-x-auto">
+                <table class="w-full bg-white dark:bg-gray-800 rounded shadow mb-4 sortable">
+                    <thead>
+                        <tr class="bg-gray-200 dark:bg-gray-700">
+                            <th class="p-2 table-header">Serwer</th>
+                            <th class="p-2 table-header">Uruchomienie</th>
+                            <th class="p-2 table-header">Poprzednie</th>
+                            <th class="p-2 table-header">Dodane</th>
+                            <th class="p-2 table-header">Usunięte</th>
+                            <th class="p-2 table-header">Zmienione</th>
+                            <th class="p-2 table-header">Błędy przed / po</th>
+                            <th class="p-2 table-header">Ostrzeżenia przed / po</th>
+                            <th class="p-2 table-header">Błędy / 1000 zdarzeń przed / po</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {''.join([f'<tr><td class="p-2">{row["Server"]}</td><td class="p-2">{row["BootTime"]}</td><td class="p-2">{row["PrevBootTime"]}</td><td class="p-2">{format_mod_list(row["Added"])}</td><td class="p-2">{format_mod_list(row["Removed"])}</td><td class="p-2">{format_mod_list(row["Changed"], changed=True)}</td><td class="p-2">{row["ErrorsBefore"]} / {row["ErrorsAfter"]}</td><td class="p-2">{row["WarningsBefore"]} / {row["WarningsAfter"]}</td><td class="p-2">{row["ErrorRateBefore"]:.2f} / {row["ErrorRateAfter"]:.2f}</td></tr>' for row in mod_changes])}
+                    </tbody>
+                </table>
+            </div>
         </section>
 
         <!-- Problemy z modami -->
@@ -1127,7 +4302,7 @@ document.addEventListener('DOMContentLoaded', () => {
     </div>
 
     <script>
-        {javascript_code}
+        {REPORT_JAVASCRIPT}
     </script>
 </body>
 </html>
@@ -1146,22 +4321,147 @@ document.addEventListener('DOMContentLoaded', () => {
             logging.error(f"Nie udało się dopisać do ERROR_LOG: {e2}")
         logging.error(f"❌ Błąd w generate_html_report: {e}")
 
+# Potok analizy po parsowaniu jako zadeklarowany graf etapów: każdy etap ma jawne wejścia i wyjścia,
+# etapy, których wejścia są gotowe, wykonują się równolegle w puli wątków. Tabela zdarzeń (df)
+# i grupy godzinowe (hours) są osobnymi węzłami liczonymi raz. Etapy nie są pomijane między
+# uruchomieniami: niemal każdy zależy od całego korpusu, który w CI rośnie co pół godziny
+STAGE_TIMINGS_FILE = os.path.join("logs", "stage_timings.json")
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+def merge_chart_groups(*groups):
+    merged = {}
+    for group in groups:
+        merged.update(group or {})
+    return merged
+
+def retention_history(other_charts, save_charts, warning_charts, server_summary, day_pages, anomalies):
+    history = load_retention_store()
+    merge_retention_history(history, other_charts, save_charts, warning_charts)
+    server_summary, day_pages_rows = merge_history_rows(server_summary, day_pages, history_totals(history), anomalies)
+    return history, server_summary, day_pages_rows
+
+PIPELINE_STAGES = [
+    {"name": "table", "run": export_data, "inputs": ["events"], "outputs": ["df"]},
+    {"name": "hours", "run": hour_groups, "inputs": ["df"], "outputs": ["hours"]},
+    {"name": "stats", "run": detect_errors_and_stats, "inputs": ["events", "df"], "outputs": ["errors", "warnings", "warning_types", "mod_issues", "sessions_df", "admin_cmds"]},
+    {"name": "saves", "run": handle_saves, "inputs": ["events", "df", "hours"], "outputs": ["df_saves", "save_charts"]},
+    {"name": "warning_charts", "run": monitor_and_predict, "inputs": ["warnings", "hours"], "outputs": ["warning_charts"]},
+    {"name": "charts", "run": generate_charts, "inputs": ["df", "sessions_df", "admin_cmds", "hours"], "outputs": ["event_charts"]},
+    {"name": "mod_charts", "run": export_mod_issues, "inputs": ["df", "mod_issues"], "outputs": ["mod_charts"]},
+    {"name": "other_charts", "run": merge_chart_groups, "inputs": ["event_charts", "mod_charts"], "outputs": ["other_charts"]},
+    {"name": "server_summary", "run": summarize_servers, "inputs": ["df", "sessions_df"], "outputs": ["server_summary"]},
+    {"name": "session_index", "run": build_session_index, "inputs": ["sessions_df", "df"], "outputs": ["session_index"]},
+    {"name": "concurrency", "run": lambda index: index["concurrency"], "inputs": ["session_index"], "outputs": ["concurrency"]},
+    {"name": "mod_manifest", "run": build_mod_manifest_index, "inputs": ["df"], "outputs": ["mod_manifest"]},
+    {"name": "time_index", "run": update_time_index, "inputs": ["namespaces"], "outputs": []},
+    {"name": "fingerprints", "run": build_fingerprint_table, "inputs": ["events"], "outputs": ["fingerprints"]},
+    {"name": "anomalies", "run": detect_anomalies, "inputs": ["df", "rebuild_anomalies"], "outputs": ["anomalies"]},
+    {"name": "network", "run": correlate_network_disconnects, "inputs": ["df"], "outputs": ["network"]},
+    {"name": "save_ops", "run": track_save_operations, "inputs": ["df"], "outputs": ["save_ops"]},
+    {"name": "boot_profiles", "run": build_boot_profiles, "inputs": ["df", "save_ops"], "outputs": ["boot_profiles"]},
+    {"name": "density_budget", "run": build_density_budget, "inputs": ["events", "mod_manifest"], "outputs": ["density_budget"]},
+    {"name": "day_pages", "run": generate_day_pages, "inputs": ["df", "sessions_df", "anomalies"], "outputs": ["day_pages"]},
+    {"name": "export", "run": export_partitions, "inputs": ["events", "sessions_df", "mod_issues", "df"], "outputs": []},
+    {"name": "history", "run": retention_history, "inputs": ["other_charts", "save_charts", "warning_charts", "server_summary", "day_pages", "anomalies"], "outputs": ["history", "summary_rows", "day_pages_rows"]},
+    {"name": "report", "run": generate_html_report, "inputs": ["events", "event_counts", "errors", "warnings", "warning_types", "mod_issues", "sessions_df", "admin_cmds", "save_charts", "warning_charts", "other_charts", "summary_rows", "mod_manifest", "fingerprints", "anomalies", "day_pages_rows", "concurrency", "network", "save_ops", "history", "boot_profiles", "density_budget"], "outputs": []},
+]
+
+def run_stage(stage, args, pipeline_start):
+    started = time.perf_counter()
+    result = stage["run"](*args)
+    finished = time.perf_counter()
+    outputs = stage["outputs"]
+    if len(outputs) == 1:
+        values = {outputs[0]: result}
+    else:
+        values = dict(zip(outputs, result or ()))
+    timing = {
+        "Stage": stage["name"],
+        "Start": round(started - pipeline_start, 3),
+        "Seconds": round(finished - started, 3),
+    }
+    return values, timing
+
+def run_pipeline(stages, sources):
+    values = dict(sources)
+    pending = list(stages)
+    running = {}
+    timings = []
+    pipeline_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as pool:
+        while pending or running:
+            for stage in [s for s in pending if all(name in values for name in s["inputs"])]:
+                pending.remove(stage)
+                args = [values[name] for name in stage["inputs"]]
+                running[pool.submit(run_stage, stage, args, pipeline_start)] = stage
+            if not running:
+                missing = sorted({name for s in pending for name in s["inputs"] if name not in values})
+                raise RuntimeError(f"Etapy bez dostępnych wejść: {', '.join(s['name'] for s in pending)} (brak: {', '.join(missing)})")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                stage_values, timing = future.result()
+                values.update(stage_values)
+                timings.append(timing)
+                logging.info(f"⏱️ Etap {timing['Stage']}: {timing['Seconds']:.2f} s")
+    wall = time.perf_counter() - pipeline_start
+    total = sum(t["Seconds"] for t in timings)
+    logging.info(f"⏱️ Potok etapów: {wall:.2f} s (suma etapów {total:.2f} s, etapy: {len(timings)}, {PIPELINE_WORKERS} wątki)")
+    try:
+        with open(STAGE_TIMINGS_FILE, "w", encoding="utf-8") as f:
+            json.dump({"wall_seconds": round(wall, 3), "stage_seconds": round(total, 3), "workers": PIPELINE_WORKERS, "stages": timings}, f, ensure_ascii=False, indent=1)
+    except OSError as e:
+        logging.warning(f"⚠️ Nie można zapisać {STAGE_TIMINGS_FILE}: {e}")
+    return values
+
 # Główna funkcja
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analizator logów serwera FS25")
+    parser.add_argument("--fast-scan", action="store_true", help="tylko liczniki i agregaty godzinowe (mmap, bez pełnego raportu; te same reguły grupowania co pełna analiza)")
+    parser.add_argument("--rebuild-anomalies", action="store_true", help="przelicz wykrywanie anomalii od zera na całej historii")
+    parser.add_argument("--bench-memory", action="store_true", help="porównanie pamięci na zdarzenie (słownik vs Event) na log_cache")
+    parser.add_argument("--profile-patterns", action="store_true", help="profil wzorców EVENTS: próby, trafienia, czas i sugerowana kolejność")
+    parser.add_argument("--bench-patterns", action="store_true", help="czas parsowania złośliwych linii (ReDoS) i linii z log_cache: wypłaszczenie powyżej limitu długości")
+    parser.add_argument("--online-at", metavar="CZAS", help="zapytanie: kto był online w danej chwili (np. \"2025-10-20 18:04\")")
+    parser.add_argument("--since", metavar="CZAS", help="analiza tylko zakresu czasu od podanej chwili (indeks czasu plików, bez pełnego raportu)")
+    parser.add_argument("--until", metavar="CZAS", help="koniec zakresu czasu dla --since (lub sam koniec zakresu)")
+    parser.add_argument("--online-between", nargs=2, metavar=("OD", "DO"), help="zapytanie: sesje i szczyt graczy online w zakresie czasu")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     try:
+        args = parse_args(argv)
         print("✅ Skrypt uruchomiony — zaczynam analizę...")
-        download_logs(FTP_DIR)
-        download_logs(FTP_DIR2)
-        events, event_counts = analyze_logs()
-        errors, warnings, warning_types, mod_issues, sessions_df, admin_cmds = detect_errors_and_stats(events)
-        df_saves, save_charts = handle_saves(events)
-        warning_charts = monitor_and_predict(warnings)
-        other_charts = generate_charts(pd.DataFrame(events), sessions_df, admin_cmds)
-        df = export_data(events, sessions_df)
-        mod_charts = export_mod_issues(df, mod_issues)
-        other_charts.update(mod_charts)
-        generate_html_report(events, event_counts, errors, warnings, warning_types, mod_issues, sessions_df, admin_cmds, save_charts, warning_charts, other_charts)
+        servers = load_servers()
+        migrate_legacy_cache(servers)
+        if servers:
+            with ThreadPoolExecutor(max_workers=len(servers)) as pool:
+                list(pool.map(download_logs, servers))
+        else:
+            logging.warning("⚠️ Brak skonfigurowanych serwerów FTP - analizuję tylko lokalny log_cache.")
+        if args.bench_memory:
+            benchmark_event_memory(discover_namespaces(servers))
+            return
+        if args.fast_scan:
+            run_fast_scan(discover_namespaces(servers))
+            logging.info("✅ Szybkie skanowanie zakończone.")
+            return
+        if args.profile_patterns:
+            run_pattern_profile(discover_namespaces(servers))
+            return
+        if args.bench_patterns:
+            benchmark_patterns(discover_namespaces(servers))
+            return
+        if args.since or args.until:
+            run_range_analysis(discover_namespaces(servers), args.since, args.until)
+            return
+        if args.online_at or args.online_between:
+            run_session_query(discover_namespaces(servers), args.online_at, args.online_between)
+            return
+        events, event_counts = analyze_logs(discover_namespaces(servers))
+        events = compact_retention(events)
+        run_pipeline(PIPELINE_STAGES, {"events": events, "event_counts": event_counts, "rebuild_anomalies": args.rebuild_anomalies, "namespaces": discover_namespaces(servers)})
         logging.info("✅ Analiza zakończona pomyślnie.")
     except Exception as e:
         with open(ERROR_LOG, "a", encoding="utf-8") as f: